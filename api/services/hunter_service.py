@@ -41,11 +41,11 @@ class APIHunterService:
         
         if rps_threshold is not None:
             original_rps = self.core_service.config.get('strategy.alpha_trident.rps_threshold')
-            self.core_service.config.config['strategy']['alpha_trident']['rps_threshold'] = rps_threshold
+            self.core_service.config.set('strategy.alpha_trident.rps_threshold', rps_threshold)
         
         if volume_ratio_threshold is not None:
             original_vol_ratio = self.core_service.config.get('strategy.alpha_trident.vol_ratio_threshold')
-            self.core_service.config.config['strategy']['alpha_trident']['vol_ratio_threshold'] = volume_ratio_threshold
+            self.core_service.config.set('strategy.alpha_trident.vol_ratio_threshold', volume_ratio_threshold)
         
         try:
             # 执行扫描
@@ -53,9 +53,9 @@ class APIHunterService:
             
             # 恢复原始配置
             if original_rps is not None:
-                self.core_service.config.config['strategy']['alpha_trident']['rps_threshold'] = original_rps
+                self.core_service.config.set('strategy.alpha_trident.rps_threshold', original_rps)
             if original_vol_ratio is not None:
-                self.core_service.config.config['strategy']['alpha_trident']['vol_ratio_threshold'] = original_vol_ratio
+                self.core_service.config.set('strategy.alpha_trident.vol_ratio_threshold', original_vol_ratio)
             
             # 转换结果
             if not result.success:
@@ -136,9 +136,9 @@ class APIHunterService:
             logger.exception("Hunter扫描异常")
             # 恢复原始配置
             if original_rps is not None:
-                self.core_service.config.config['strategy']['alpha_trident']['rps_threshold'] = original_rps
+                self.core_service.config.set('strategy.alpha_trident.rps_threshold', original_rps)
             if original_vol_ratio is not None:
-                self.core_service.config.config['strategy']['alpha_trident']['vol_ratio_threshold'] = original_vol_ratio
+                self.core_service.config.set('strategy.alpha_trident.vol_ratio_threshold', original_vol_ratio)
             
             return {
                 "success": False,
@@ -54,12 +54,8 @@ class APILabService:
                 # 尝试多个配置路径
                 original_max_positions = self.core_service.config.get('strategy.backtest.max_positions') or \
                                         self.core_service.config.get('backtest.max_positions')
-                # 确保配置字典存在
-                if 'strategy' not in self.core_service.config.config:
-                    self.core_service.config.config['strategy'] = {}
-                if 'backtest' not in self.core_service.config.config['strategy']:
-                    self.core_service.config.config['strategy']['backtest'] = {}
-                self.core_service.config.config['strategy']['backtest']['max_positions'] = max_positions
+                # set() 会自动创建缺失的中间层级
+                self.core_service.config.set('strategy.backtest.max_positions', max_positions)
             
             try:
                 # 执行回测
@@ -75,9 +71,7 @@ class APILabService:
                 
                 # 恢复原始配置
                 if original_max_positions is not None:
-                    if 'strategy' in self.core_service.config.config and \
-                       'backtest' in self.core_service.config.config['strategy']:
-                        self.core_service.config.config['strategy']['backtest']['max_positions'] = original_max_positions
+                    self.core_service.config.set('strategy.backtest.max_positions', original_max_positions)
                 
                 if not result.success:
                     return {
@@ -95,9 +89,7 @@ class APILabService:
             except Exception as e:
                 # 恢复原始配置
                 if original_max_positions is not None:
-                    if 'strategy' in self.core_service.config.config and \
-                       'backtest' in self.core_service.config.config['strategy']:
-                        self.core_service.config.config['strategy']['backtest']['max_positions'] = original_max_positions
+                    self.core_service.config.set('strategy.backtest.max_positions', original_max_positions)
                 raise
                 
         except Exception as e:
@@ -42,7 +42,7 @@ class TushareAPI:
                 fields='ts_code,symbol,name,area,industry,list_date,is_hs'
             )
             # 判断是否为ST股票（通过名称）
-            result['is_st'] = result['name'].str.contains('ST|\\*ST', regex=True, na=False)
+            result['is_st'] = result['name'].str.contains('ST', regex=False, na=False)
             logger.info(f"成功获取 {len(result)} 只股票")
             return result
         except Exception as e:
@@ -78,10 +78,8 @@ class TushareAPI:
         logger.debug(f"获取 {len(stock_list)} 只股票的财务指标...")
         
         # 计算日期范围
-        end_date = trade_date
-        start_date = (datetime.strptime(trade_date, '%Y%m%d') - timedelta(days=365)).strftime('%Y%m%d')
-        start_dt = datetime.strptime(start_date, '%Y%m%d')
-        end_dt = datetime.strptime(end_date, '%Y%m%d')
+        end_dt = datetime.strptime(trade_date, '%Y%m%d')
+        start_dt = end_dt - timedelta(days=365)
         
         all_indicators = []
         batch_size = 100
@@ -98,16 +96,9 @@ class TushareAPI:
                             fields='ts_code,end_date,roe,netprofit_yoy'
                         )
                         
+                        # 日期过滤与取最新在循环结束后对合并结果统一处理
                         if not fina_indicator.empty and 'end_date' in fina_indicator.columns:
-                            fina_indicator['end_date'] = pd.to_datetime(fina_indicator['end_date'], format='%Y%m%d', errors='coerce')
-                            fina_indicator = fina_indicator[
-                                (fina_indicator['end_date'] >= start_dt) & 
-                                (fina_indicator['end_date'] <= end_dt)
-                            ]
-                            
-                            if not fina_indicator.empty:
-                                latest = fina_indicator.sort_values('end_date').iloc[-1:].copy()
-                                all_indicators.append(latest)
+                            all_indicators.append(fina_indicator)
                         
                         time.sleep(0.2)
                         
@@ -119,8 +110,15 @@ class TushareAPI:
                 if i + batch_size < len(stock_list):
                     time.sleep(0.5)
         
+        result = pd.DataFrame()
         if all_indicators:
             result = pd.concat(all_indicators, ignore_index=True)
+            result['end_date'] = pd.to_datetime(result['end_date'], format='%Y%m%d', errors='coerce')
+            result = result[(result['end_date'] >= start_dt) & (result['end_date'] <= end_dt)]
+            latest_idx = result.groupby('ts_code', sort=False)['end_date'].idxmax()
+            result = result.loc[latest_idx].reset_index(drop=True)
+        
+        if not result.empty:
             result['end_date'] = result['end_date'].dt.strftime('%Y%m%d')
             result = result.rename(columns={
                 'netprofit_yoy': 'net_profit_growth_rate'
@@ -122,10 +122,10 @@ class VectorBacktester:
         df['return'] = np.nan
         
         # 买入价格：T+1 Open
-        df['buy_price'] = df.groupby('ts_code')['open'].shift(-1)
+        df['buy_price'] = df.groupby('ts_code', observed=True)['open'].shift(-1)
         
         # 卖出价格：T+1+HoldingDays Close
-        df['sell_price'] = df.groupby('ts_code')['close'].shift(-(1 + holding_days))
+        df['sell_price'] = df.groupby('ts_code', observed=True)['close'].shift(-(1 + holding_days))
         
         # 向量化检查止损：为每个持仓日创建shift列，检查Low价格
         # 创建holding_days个shift列，检查T+1到T+1+HoldingDays的Low价格
@@ -133,7 +133,7 @@ class VectorBacktester:
         
         for day in range(1, holding_days + 1):
             # 获取T+day的Low价格
-            low_price = df.groupby('ts_code')['low'].shift(-day)
+            low_price = df.groupby('ts_code', observed=True)['low'].shift(-day)
             # 检查是否触发止损：Low < Buy_Price * (1 - stop_loss_pct)
             stop_loss_mask = (low_price < df['buy_price'] * (1 - stop_loss_pct)) & df['buy_price'].notna()
             stop_loss_triggered = stop_loss_triggered | stop_loss_mask
@@ -217,20 +217,12 @@ class VectorBacktester:
         Returns:
             Dict包含: win_rate, total_return, max_drawdown, avg_return, sharpe_ratio
         """
-        if returns.empty or returns.isna().all():
-            return {
-                'win_rate': 0.0,
-                'total_return': 0.0,
-                'max_drawdown': 0.0,
-                'avg_return': 0.0,
-                'sharpe_ratio': 0.0,
-                'total_trades': 0
-            }
+        # 移除NaN，后续所有指标都在同一个ndarray上计算，避免多次Series遍历
+        valid_returns = returns.to_numpy(dtype=float)
+        valid_returns = valid_returns[~np.isnan(valid_returns)]
+        total_trades = len(valid_returns)
         
-        # 移除NaN
-        valid_returns = returns.dropna()
-        
-        if len(valid_returns) == 0:
+        if total_trades == 0:
             return {
                 'win_rate': 0.0,
                 'total_return': 0.0,
@@ -241,22 +233,25 @@ class VectorBacktester:
             }
         
         # Win Rate
-        win_rate = (valid_returns > 0).sum() / len(valid_returns) * 100
+        win_rate = np.count_nonzero(valid_returns > 0) / total_trades * 100
         
         # Total Return (累计收益率)
         total_return = valid_returns.sum()
         
         # Average Return
-        avg_return = valid_returns.mean()
+        avg_return = total_return / total_trades
         
         # Max Drawdown
-        cumulative = (1 + valid_returns / 100).cumprod()
-        running_max = cumulative.expanding().max()
-        drawdown = (cumulative - running_max) / running_max * 100
-        max_drawdown = abs(drawdown.min()) if not drawdown.empty else 0.0
-        
-        # Sharpe Ratio (简化版，假设无风险利率为0)
-        std_return = valid_returns.std()
+        cumulative = np.cumprod(1 + valid_returns / 100)
+        running_max = np.maximum.accumulate(cumulative)
+        max_drawdown = abs(((cumulative - running_max) / running_max * 100).min())
+        
+        # Sharpe Ratio (简化版，假设无风险利率为0，样本标准差)
+        if total_trades > 1:
+            deviations = valid_returns - avg_return
+            std_return = np.sqrt(np.dot(deviations, deviations) / (total_trades - 1))
+        else:
+            std_return = 0.0
         sharpe_ratio = (avg_return / std_return) if std_return > 0 else 0.0
         
         return {
@@ -265,7 +260,7 @@ class VectorBacktester:
             'max_drawdown': float(max_drawdown),
             'avg_return': float(avg_return),
             'sharpe_ratio': float(sharpe_ratio),
-            'total_trades': len(valid_returns)
+            'total_trades': total_trades
         }
     
     def _calculate_portfolio_curve(
@@ -348,23 +343,40 @@ class VectorBacktester:
         stock_contributions = {}  # {ts_code: total_gain}
         
         weight_per_pos = 1.0 / max_positions
-        
-        # 创建价格查找字典（按日期和股票代码）
+
+        # 循环不变量：止损价格系数、单仓目标市值、含成本买入系数
+        stop_loss_factor = 1 - stop_loss_pct
+        stop_loss_return = (-stop_loss_pct - cost_rate) * 100
+        position_value = initial_capital * weight_per_pos
+        buy_cost_factor = 1 + cost_rate
+
+        # 创建价格查找字典（按日期和股票代码，按列一次性取出，避免iterrows逐行构造Series）
+        n_rows = len(signal_df)
+        price_columns = {
+            col: signal_df[col].to_numpy() if col in signal_df.columns else np.full(n_rows, np.nan)
+            for col in ('open', 'close', 'low', 'high')
+        }
         price_dict = {}
-        for _, row in signal_df.iterrows():
-            date = row['trade_date']
-            code = row['ts_code']
-            if date not in price_dict:
-                price_dict[date] = {}
-            price_dict[date][code] = {
-                'open': row.get('open', np.nan),
-                'close': row.get('close', np.nan),
-                'low': row.get('low', np.nan),
-                'high': row.get('high', np.nan)
+        for date, code, open_, close, low, high in zip(
+            signal_df['trade_date'], signal_df['ts_code'],
+            price_columns['open'], price_columns['close'],
+            price_columns['low'], price_columns['high']
+        ):
+            price_dict.setdefault(date, {})[code] = {
+                'open': open_,
+                'close': close,
+                'low': low,
+                'high': high
             }
-        
-        # 逐日模拟
-        for trade_date in trade_dates:
+
+        # 预先按日期分组买入信号，避免每日对全表做布尔过滤
+        signals_by_date = {
+            date: group
+            for date, group in signal_df[signal_df['buy_signal'] == 1].groupby('trade_date', sort=False)
+        }
+
+        # 逐日模拟（date_idx 为交易日序号，T+1 直接按序号取，无需在列表中查找）
+        for date_idx, trade_date in enumerate(trade_dates):
             # 1. 卖出逻辑：检查现有持仓
             positions_to_remove = []
             for ts_code, pos_info in positions.items():
@@ -384,7 +396,7 @@ class VectorBacktester:
                     
                     if not (np.isnan(current_low) or np.isnan(current_close)):
                         # 检查止损：Low < Buy_Price * (1 - stop_loss_pct)
-                        stop_loss_price = buy_price * (1 - stop_loss_pct)
+                        stop_loss_price = buy_price * stop_loss_factor
                         stop_loss_triggered = current_low < stop_loss_price
                         
                         # 检查持仓天数（持仓天数从买入日之后开始计算）
@@ -394,7 +406,7 @@ class VectorBacktester:
                             # 卖出
                             if stop_loss_triggered:
                                 sell_price = stop_loss_price  # 止损价
-                                return_pct = (-stop_loss_pct - cost_rate) * 100
+                                return_pct = stop_loss_return
                                 exit_reason = "Stop Loss"
                             else:
                                 sell_price = current_close  # 正常退出
@@ -436,10 +448,9 @@ class VectorBacktester:
             # 2. 买入逻辑：检查新信号（在T日看到信号，在T+1日买入）
             if len(positions) < max_positions and cash > 0:
                 # 获取当日的买入信号
-                day_signals = signal_df[
-                    (signal_df['trade_date'] == trade_date) & 
-                    (signal_df['buy_signal'] == 1)
-                ].copy()
+                day_signals = signals_by_date.get(trade_date)
+                if day_signals is None:
+                    day_signals = signal_df.iloc[0:0]
                 
                 # 排除已持有的股票
                 day_signals = day_signals[~day_signals['ts_code'].isin(positions.keys())]
@@ -456,22 +467,19 @@ class VectorBacktester:
                     ts_code = row['ts_code']
                     
                     # 获取T+1的买入价格（使用下一个交易日的开盘价）
-                    next_date_idx = trade_dates.index(trade_date) + 1
+                    next_date_idx = date_idx + 1
                     if next_date_idx < len(trade_dates):
                         next_date = trade_dates[next_date_idx]
                         if next_date in price_dict and ts_code in price_dict[next_date]:
                             buy_price = price_dict[next_date][ts_code].get('open', np.nan)
                             
                             if not np.isnan(buy_price) and buy_price > 0:
-                                # 计算买入金额（使用初始资金的固定比例）
-                                position_value = initial_capital * weight_per_pos
-                                
-                                # 检查现金是否足够
-                                if cash >= position_value * (1 + cost_rate):
-                                    shares = int(position_value / (buy_price * (1 + cost_rate)))
+                                # 检查现金是否足够（买入金额为初始资金的固定比例）
+                                if cash >= position_value * buy_cost_factor:
+                                    shares = int(position_value / (buy_price * buy_cost_factor))
                                     
                                     if shares > 0:
-                                        cost = buy_price * shares * (1 + cost_rate)
+                                        cost = buy_price * shares * buy_cost_factor
                                         cash -= cost
                                         
                                         # 记录持仓（买入日期为T+1，持仓天数从0开始）
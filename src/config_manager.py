@@ -2,17 +2,26 @@
 配置管理模块
 """
 
-import yaml
+import copy
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Dict, Optional, Tuple
 from .logging_config import get_logger
 
 logger = get_logger(__name__)
 
+# 解析结果缓存：{(配置文件路径, mtime_ns): 解析后的配置}
+# 同一文件未修改时多个ConfigManager实例无需重复解析YAML
+_PARSED_CACHE: Dict[Tuple[str, int], Dict[str, Any]] = {}
+
 
 class ConfigManager:
     """配置管理器"""
     
+    __slots__ = ('config_path', 'config', '_flat')
+    
+    # 进程内共享实例：{配置文件路径: (mtime_ns, ConfigManager)}，见 shared()
+    _instances: Dict[str, Tuple[int, 'ConfigManager']] = {}
+    
     def __init__(self, config_path: str = 'config/settings.yaml'):
         """
         初始化配置管理器
@@ -22,20 +31,96 @@ class ConfigManager:
         """
         self.config_path = Path(config_path)
         self.config = {}
+        self._flat: Dict[str, Any] = {}
         self._load_config()
     
+    @classmethod
+    def shared(cls, config_path: str = 'config/settings.yaml') -> 'ConfigManager':
+        """
+        获取进程内共享的只读实例（每个配置文件一个）
+        
+        适用于循环/重试中只读取配置的调用点；需要通过 set() 临时覆盖配置时
+        请使用独立实例 ConfigManager()，避免影响其他调用方。
+        每次调用会 stat 配置文件，文件修改（mtime 变化）后自动重建实例，
+        与 ConfigManager() 读取到的配置保持一致。
+        
+        Args:
+            config_path: 配置文件路径
+        
+        Returns:
+            ConfigManager实例
+        """
+        try:
+            mtime_ns = Path(config_path).stat().st_mtime_ns
+        except OSError:
+            # 文件不存在等情况交给构造函数统一报错
+            cls._instances.pop(config_path, None)
+            return cls(config_path)
+        
+        cached = cls._instances.get(config_path)
+        if cached is not None and cached[0] == mtime_ns:
+            return cached[1]
+        
+        instance = cls(config_path)
+        cls._instances[config_path] = (mtime_ns, instance)
+        return instance
+    
+    @classmethod
+    def reset(cls):
+        """清空共享实例（测试隔离或配置文件变更后使用）"""
+        cls._instances.clear()
+    
     def _load_config(self):
         """加载配置"""
         if not self.config_path.exists():
             logger.error(f"配置文件不存在: {self.config_path}")
             raise FileNotFoundError(f"配置文件不存在: {self.config_path}")
         
-        with open(self.config_path, 'r', encoding='utf-8') as f:
-            self.config = yaml.safe_load(f)
+        cache_key = (str(self.config_path.resolve()), self.config_path.stat().st_mtime_ns)
+        parsed = _PARSED_CACHE.get(cache_key)
+        if parsed is None:
+            # 仅在缓存未命中时导入yaml，只引用ConfigManager的模块无需加载PyYAML
+            import yaml
+            with open(self.config_path, 'r', encoding='utf-8') as f:
+                # 优先使用libyaml的C加载器，未安装时回退到纯Python实现
+                parsed = yaml.load(f, Loader=getattr(yaml, 'CSafeLoader', yaml.SafeLoader))
+            _PARSED_CACHE[cache_key] = parsed
+        
+        # 每个实例持有独立副本，避免调用方修改配置时污染缓存
+        self.config = copy.deepcopy(parsed)
+        self._flat = self._flatten(self.config)
         
         logger.debug(f"配置加载完成: {self.config_path}")
         logger.debug(f"配置内容: {self.config}")
     
+    @staticmethod
+    def _flatten(config: Any) -> Dict[str, Any]:
+        """
+        将嵌套配置展开为点号分隔的键
+        
+        中间层级也会保留（值为对应的子字典），因此 get('index_filter') 与
+        get('index_filter.index_code') 均为一次字典查找。
+        
+        Args:
+            config: 解析后的配置（通常为dict）
+        
+        Returns:
+            {点号路径: 配置值}
+        """
+        flat: Dict[str, Any] = {}
+        if not isinstance(config, dict):
+            return flat
+        
+        stack = [('', config)]
+        while stack:
+            prefix, node = stack.pop()
+            for k, v in node.items():
+                path = f"{prefix}{k}"
+                flat[path] = v
+                if isinstance(v, dict):
+                    stack.append((f"{path}.", v))
+        return flat
+    
     def get(self, key: str, default: Any = None) -> Any:
         """
         获取配置项（支持点号分隔的嵌套键，如 'api.use_free_api'）
@@ -47,23 +132,42 @@ class ConfigManager:
         Returns:
             配置值
         """
-        keys = key.split('.')
-        value = self.config
-        
         try:
-            for k in keys:
-                value = value[k]
-            
-            if value is None:
-                logger.warning(f"配置项 {key} 值为 None，使用默认值: {default}")
-                return default
-            
-            return value
-        except (KeyError, TypeError):
+            value = self._flat[key]
+        except KeyError:
             logger.warning(f"配置项 {key} 不存在，使用默认值: {default}")
             return default
+        
+        if value is None:
+            logger.warning(f"配置项 {key} 值为 None，使用默认值: {default}")
+            return default
+        
+        return value
+    
+    def set(self, key: str, value: Any):
+        """
+        设置配置项（支持点号分隔的嵌套键，缺失的中间层级会自动创建）
+        
+        运行期临时覆盖配置应使用此方法，直接修改 self.config 不会反映到 get() 中。
+        
+        Args:
+            key: 配置键（支持点号分隔，如 'strategy.alpha_trident.rps_threshold'）
+            value: 配置值
+        """
+        *parents, leaf = key.split('.')
+        node = self.config
+        for k in parents:
+            if not isinstance(node.get(k), dict):
+                node[k] = {}
+            node = node[k]
+        node[leaf] = value
+        self._flat = self._flatten(self.config)
     
     def reload(self):
         """重新加载配置"""
+        # 丢弃该文件的缓存条目，强制重新解析
+        resolved = str(self.config_path.resolve())
+        for cache_key in [k for k in _PARSED_CACHE if k[0] == resolved]:
+            del _PARSED_CACHE[cache_key]
         self._load_config()
         logger.info("配置已重新加载")
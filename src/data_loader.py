@@ -5,23 +5,54 @@ Data Loader Module - 支持多种数据源的统一数据加载
 
 import os
 import pandas as pd
-import tushare as ts
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from tqdm import tqdm
 import requests
 import json
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 
 from .logging_config import get_logger
 
 logger = get_logger(__name__)
 
+# tushare 导入较慢，延迟到首次初始化 Tushare Pro 句柄时再加载，见 _tushare()
+# 保留模块属性，测试中 patch('src.data_loader.ts') 仍然有效
+ts = None
+
+
+def _tushare():
+    """返回 tushare 模块（首次调用时导入）"""
+    global ts
+    if ts is None:
+        import tushare
+        ts = tushare
+    return ts
+
+
+# 取值高度重复的列，加载后转为 category 以减少内存并加速 merge/groupby
+_CATEGORY_COLUMNS = ('ts_code', 'industry', 'area', 'is_hs')
+
+
+def _categorize(df: pd.DataFrame) -> pd.DataFrame:
+    """将 df 中存在的 _CATEGORY_COLUMNS 列转换为 category 类型"""
+    cols = [c for c in _CATEGORY_COLUMNS if c in df.columns]
+    if cols:
+        df = df.astype({c: 'category' for c in cols})
+    return df
+
 
 class DataLoader:
     """统一数据加载器，支持多种数据源"""
     
+    # 进程内共享的 Tushare Pro 句柄：{token: pro_api()}，见 _get_pro()
+    _pro_cache: Dict[str, Any] = {}
+    # .env 只需加载一次
+    _dotenv_loaded = False
+    
     def __init__(self, use_free_api: bool = False, use_api_abstraction: bool = False):
         """
         初始化数据加载器
@@ -30,8 +61,10 @@ class DataLoader:
             use_free_api: 是否使用免费 API（默认 False，使用 Tushare）
             use_api_abstraction: 是否使用API抽象层（默认 False，保持向后兼容）
         """
-        # 加载 .env 文件
-        load_dotenv()
+        # 加载 .env 文件（进程内仅首次）
+        if not DataLoader._dotenv_loaded:
+            load_dotenv()
+            DataLoader._dotenv_loaded = True
         token = os.getenv('TUSHARE_TOKEN')
         
         self.use_free_api = use_free_api
@@ -65,12 +98,36 @@ class DataLoader:
                 else:
                     logger.warning("未找到TUSHARE_TOKEN，部分功能可能受限")
             else:
-                ts.set_token(token)
-                self.pro = ts.pro_api()
-                logger.info("Tushare Pro API 初始化成功")
+                self.pro = self._get_pro(token)
             
             # 东方财富公告接口 (免费API) - 保留用于向后兼容
             self.eastmoney_api_url = "https://np-anotice-stock.eastmoney.com/api/security/ann"
+    
+    @classmethod
+    def _get_pro(cls, token: str):
+        """
+        获取 token 对应的 Tushare Pro 句柄（同一 token 只初始化一次）
+        
+        Args:
+            token: Tushare Pro token
+        
+        Returns:
+            Tushare Pro API 对象
+        """
+        pro = cls._pro_cache.get(token)
+        if pro is None:
+            tushare = _tushare()
+            tushare.set_token(token)
+            pro = tushare.pro_api()
+            cls._pro_cache[token] = pro
+            logger.info("Tushare Pro API 初始化成功")
+        return pro
+    
+    @classmethod
+    def reset(cls):
+        """清空缓存的 Tushare Pro 句柄并允许重新加载 .env（测试隔离时使用）"""
+        cls._pro_cache.clear()
+        cls._dotenv_loaded = False
         
     def get_stock_basics(self):
         """
@@ -91,8 +148,9 @@ class DataLoader:
                 fields='ts_code,symbol,name,area,industry,list_date,is_hs'
             )
             
-            # 判断是否为ST股票（通过名称）
-            stock_basic['is_st'] = stock_basic['name'].str.contains('ST|\\*ST', regex=True, na=False)
+            # 判断是否为ST股票（通过名称；*ST 也包含 ST，用普通子串匹配即可，无需正则）
+            stock_basic['is_st'] = stock_basic['name'].str.contains('ST', regex=False, na=False)
+            stock_basic = _categorize(stock_basic)
             
             logger.info(f"成功获取 {len(stock_basic)} 只股票")
             return stock_basic
@@ -128,6 +186,7 @@ class DataLoader:
                 'dv_ttm': 'dividend_yield',  # 股息率
                 'total_mv': 'total_market_cap'  # 总市值（万元）
             })
+            daily_basic = _categorize(daily_basic)
             
             logger.info(f"成功获取 {len(daily_basic)} 条每日指标")
             return daily_basic
@@ -158,10 +217,8 @@ class DataLoader:
                 stock_list = stock_basics['ts_code'].tolist()
             
             # 计算日期范围（获取过去一年的数据，然后取最新）
-            end_date = trade_date
-            start_date = (datetime.strptime(trade_date, '%Y%m%d') - timedelta(days=365)).strftime('%Y%m%d')
-            start_dt = datetime.strptime(start_date, '%Y%m%d')
-            end_dt = datetime.strptime(end_date, '%Y%m%d')
+            end_dt = datetime.strptime(trade_date, '%Y%m%d')
+            start_dt = end_dt - timedelta(days=365)
             
             all_indicators = []
             total_stocks = len(stock_list)
@@ -184,18 +241,9 @@ class DataLoader:
                                 fields='ts_code,end_date,roe,netprofit_yoy'
                             )
                             
+                            # 日期过滤与取最新在循环结束后对合并结果统一处理
                             if not fina_indicator.empty and 'end_date' in fina_indicator.columns:
-                                # 过滤日期范围
-                                fina_indicator['end_date'] = pd.to_datetime(fina_indicator['end_date'], format='%Y%m%d', errors='coerce')
-                                fina_indicator = fina_indicator[
-                                    (fina_indicator['end_date'] >= start_dt) & 
-                                    (fina_indicator['end_date'] <= end_dt)
-                                ]
-                                
-                                if not fina_indicator.empty:
-                                    # 获取该股票的最新财务指标（按end_date排序，取最新的）
-                                    latest = fina_indicator.sort_values('end_date').iloc[-1:].copy()
-                                    all_indicators.append(latest)
+                                all_indicators.append(fina_indicator)
                             
                             # 避免请求过快（Tushare API有频率限制）
                             time.sleep(0.2)
@@ -215,9 +263,17 @@ class DataLoader:
             if error_count > 0:
                 logger.warning(f"{error_count} 只股票获取财务指标失败（已跳过）")
             
-            # 合并所有结果
+            # 合并所有结果（一次concat），再统一过滤日期范围并取每只股票最新一期
+            result = pd.DataFrame()
             if all_indicators:
                 result = pd.concat(all_indicators, ignore_index=True)
+                result['end_date'] = pd.to_datetime(result['end_date'], format='%Y%m%d', errors='coerce')
+                result = result[(result['end_date'] >= start_dt) & (result['end_date'] <= end_dt)]
+                # 按股票出现顺序保留end_date最新的一行
+                latest_idx = result.groupby('ts_code', sort=False)['end_date'].idxmax()
+                result = result.loc[latest_idx].reset_index(drop=True)
+            
+            if not result.empty:
                 # 转换日期回字符串格式
                 result['end_date'] = result['end_date'].dt.strftime('%Y%m%d')
                 # 重命名列
@@ -248,7 +304,6 @@ class DataLoader:
             pd.DataFrame: 包含股票代码、公告日期、公告标题等信息
         """
         try:
-            all_notices = []
             total_stocks = len(stock_list)
             error_count = 0
             error_samples = []  # 保存前几个错误示例
@@ -267,55 +322,83 @@ class DataLoader:
                 logger.info("使用东方财富免费API获取公告")
                 return self.eastmoney_api.get_notices(stock_list, start_date)
             
-            # 批量获取公告（Tushare API 可能需要分批处理）
-            batch_size = 50  # 每批处理50只股票
+            # 并发数与调用间隔（从配置读取）
+            try:
+                from .config_manager import ConfigManager
+                config = ConfigManager.shared()
+                max_workers = config.get('concurrency.notice_workers', 5)
+                api_delay = config.get('api_rate_limit.notice_delay', 0.2)
+            except Exception:
+                max_workers = 5
+                api_delay = 0.2
+            # 配置为0或负数时 ThreadPoolExecutor 会报错，至少保留1个工作线程
+            max_workers = max(1, int(max_workers))
+            
+            # 所有工作线程共享的节流：相邻两次 anns_d 调用至少间隔 api_delay 秒，
+            # 总请求速率不随并发数增加（默认0.2秒，与原串行获取的约5次/秒一致）
+            throttle_lock = threading.Lock()
+            next_call_at = [0.0]
+            
+            def fetch_single(ts_code):
+                """获取单只股票的公告（在线程池中执行）"""
+                with throttle_lock:
+                    wait = next_call_at[0] - time.monotonic()
+                    if wait > 0:
+                        time.sleep(wait)
+                    next_call_at[0] = time.monotonic() + api_delay
+                # 使用 anns_d 接口（上市公司公告接口）
+                # 注意：anns_d 接口参数为 ann_date, start_date, end_date
+                return self.pro.anns_d(
+                    ts_code=ts_code,
+                    start_date=start_date,
+                    end_date=end_date
+                )
+            
+            # 按 stock_list 中的位置保存结果，合并时保持原有顺序
+            notices_by_idx = {}
             
             # 使用 tqdm 显示进度
-            logger.info(f"开始获取公告信息，共 {total_stocks} 只股票...")
-            with tqdm(total=total_stocks, desc="  公告获取进度", unit="只", ncols=80) as pbar:
-                for i in range(0, len(stock_list), batch_size):
-                    batch = stock_list[i:i+batch_size]
-                    
-                    for ts_code in batch:
-                        try:
-                            # 获取公告数据
-                            # 使用 anns_d 接口（上市公司公告接口）
-                            # 注意：anns_d 接口参数为 ann_date, start_date, end_date
-                            notices = self.pro.anns_d(
-                                ts_code=ts_code,
-                                start_date=start_date,
-                                end_date=end_date
-                            )
-                            
-                            # 注意：API可能返回空DataFrame，这不一定是错误
-                            # 只有当API抛出异常才算错误
-                            if not notices.empty:
-                                # anns_d 接口返回的字段：ann_date, ts_code, name, title, url, rec_time
-                                # 确保包含我们需要的字段
-                                if 'ts_code' in notices.columns and 'ann_date' in notices.columns:
-                                    all_notices.append(notices)
-                            
-                            # 避免请求过快
-                            time.sleep(0.2)
-                            
-                        except Exception as e:
-                            # 单个股票失败不影响整体流程
-                            error_count += 1
-                            error_msg = str(e)
-                            
-                            # 保存前3个错误示例用于诊断
-                            if len(error_samples) < 3:
-                                error_samples.append({
-                                    'ts_code': ts_code,
-                                    'error': error_msg[:150]  # 限制长度
-                                })
-                            
-                            # 只在第一批或错误较多时打印示例错误，避免输出过多
-                            if error_count <= 3 or (error_count % 50 == 0):
-                                pbar.write(f"    错误示例 ({ts_code}): {error_msg[:100]}")
+            logger.info(f"开始获取公告信息，共 {total_stocks} 只股票，并发数: {max_workers}")
+            with ThreadPoolExecutor(max_workers=max_workers) as executor, \
+                 tqdm(total=total_stocks, desc="  公告获取进度", unit="只", ncols=80) as pbar:
+                future_to_idx = {
+                    executor.submit(fetch_single, ts_code): idx
+                    for idx, ts_code in enumerate(stock_list)
+                }
+                for future in as_completed(future_to_idx):
+                    idx = future_to_idx[future]
+                    ts_code = stock_list[idx]
+                    try:
+                        notices = future.result()
                         
-                        # 更新进度条
-                        pbar.update(1)
+                        # 注意：API可能返回空DataFrame，这不一定是错误
+                        # 只有当API抛出异常才算错误
+                        if not notices.empty:
+                            # anns_d 接口返回的字段：ann_date, ts_code, name, title, url, rec_time
+                            # 确保包含我们需要的字段
+                            if 'ts_code' in notices.columns and 'ann_date' in notices.columns:
+                                notices_by_idx[idx] = notices
+                        
+                    except Exception as e:
+                        # 单个股票失败不影响整体流程
+                        error_count += 1
+                        error_msg = str(e)
+                        
+                        # 保存前3个错误示例用于诊断
+                        if len(error_samples) < 3:
+                            error_samples.append({
+                                'ts_code': ts_code,
+                                'error': error_msg[:150]  # 限制长度
+                            })
+                        
+                        # 只在前几个或错误较多时打印示例错误，避免输出过多
+                        if error_count <= 3 or (error_count % 50 == 0):
+                            pbar.write(f"    错误示例 ({ts_code}): {error_msg[:100]}")
+                    
+                    # 更新进度条
+                    pbar.update(1)
+            
+            all_notices = [notices_by_idx[idx] for idx in sorted(notices_by_idx)]
             
             # 显示错误统计和成功统计
             success_count = total_stocks - error_count
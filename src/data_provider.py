@@ -5,7 +5,10 @@ Tushare：get_daily_basic, get_roe, get_daily_pct_chg；
 """
 
 import os
+import sys
 import time
+from datetime import datetime
+from functools import lru_cache
 import yaml
 from pathlib import Path
 from typing import List, Optional
@@ -28,6 +31,15 @@ logger = get_logger(__name__)
 
 load_dotenv()
 
+# Tushare daily 接口单次请求最多返回的行数
+_DAILY_MAX_ROWS = 6000
+
+
+@lru_cache(maxsize=4096)
+def _parse_trade_date(date_str: str) -> datetime:
+    """解析 YYYYMMDD 日期字符串（结果缓存：同一交易日在逐只股票的调用中反复出现）"""
+    return datetime.strptime(date_str, "%Y%m%d")
+
 
 class DataProvider:
     """Tushare 行情/财务 + 东方财富公告"""
@@ -153,13 +165,13 @@ class DataProvider:
         Returns:
             过滤后的 DataFrame
         """
-        from datetime import datetime, timedelta
+        from datetime import timedelta
         
         if df.empty or "list_date" not in df.columns:
             return df
         
         try:
-            trade_dt = datetime.strptime(trade_date, "%Y%m%d")
+            trade_dt = _parse_trade_date(trade_date)
             cutoff_date = trade_dt - timedelta(days=180)  # 6个月 = 180天
             
             df = df.copy()
@@ -185,10 +197,10 @@ class DataProvider:
         Returns:
             包含 ts_code, trade_date, open, high, low, close 的 DataFrame
         """
-        from datetime import datetime, timedelta
+        from datetime import timedelta
         
         try:
-            end_dt = datetime.strptime(end_date, "%Y%m%d")
+            end_dt = _parse_trade_date(end_date)
             start_dt = end_dt - timedelta(days=days + 10)  # 多取几天以确保有足够交易日
             start_date = start_dt.strftime("%Y%m%d")
             
@@ -252,14 +264,14 @@ class DataProvider:
         
         性能优化：并发调用 + 重试机制
         """
-        from datetime import datetime, timedelta
+        from datetime import timedelta
         from concurrent.futures import ThreadPoolExecutor, as_completed
         from tqdm import tqdm
 
         if not ts_codes:
             return pd.DataFrame(columns=["ts_code", "roe"])
         
-        end_dt = datetime.strptime(trade_date, "%Y%m%d")
+        end_dt = _parse_trade_date(trade_date)
         start_dt = end_dt - timedelta(days=365)
         
         def get_roe_single(code: str, max_retries: int = 3) -> dict:
@@ -283,7 +295,7 @@ class DataProvider:
                         logger.debug(f"get_roe {code} 失败 (尝试 {attempt + 1}/{max_retries}): {e}，重试中...")
                         try:
                             from .config_manager import ConfigManager
-                            config = ConfigManager()
+                            config = ConfigManager.shared()
                             retry_delay = config.get('api_rate_limit.retry_delay', 0.5)
                         except Exception:
                             retry_delay = 0.5
@@ -298,7 +310,7 @@ class DataProvider:
         # 尝试从配置读取，如果没有配置则使用默认值
         try:
             from .config_manager import ConfigManager
-            config = ConfigManager()
+            config = ConfigManager.shared()
             max_workers = config.get('concurrency.roe_workers', 10)
         except Exception:
             max_workers = 10
@@ -326,7 +338,7 @@ class DataProvider:
                         # 每个任务完成后短暂延迟（从配置读取）
                         try:
                             from .config_manager import ConfigManager
-                            config = ConfigManager()
+                            config = ConfigManager.shared()
                             task_delay = config.get('api_rate_limit.task_delay', 0.02)
                         except Exception:
                             task_delay = 0.02
@@ -369,7 +381,7 @@ class DataProvider:
         if not start_date or not str(start_date).strip():
             if end_date and str(end_date).strip():
                 try:
-                    end_dt = datetime.strptime(str(end_date).strip()[:8], "%Y%m%d")
+                    end_dt = _parse_trade_date(str(end_date).strip()[:8])
                     start_date = (end_dt - timedelta(days=3)).strftime("%Y%m%d")
                 except Exception:
                     start_date = datetime.now().strftime("%Y%m%d")
@@ -406,7 +418,7 @@ class DataProvider:
             logger.info(f"缓存中无成分股数据，从Tushare API获取: {index_code}")
             
             # 计算交易日期所在月份的第一天和最后一天
-            trade_dt = datetime.strptime(trade_date, "%Y%m%d")
+            trade_dt = _parse_trade_date(trade_date)
             month_start = trade_dt.replace(day=1).strftime("%Y%m%d")
             last_day = calendar.monthrange(trade_dt.year, trade_dt.month)[1]
             month_end = trade_dt.replace(day=last_day).strftime("%Y%m%d")
@@ -442,7 +454,7 @@ class DataProvider:
                 df_latest = df[df["trade_date"] == latest_date].copy()
             else:
                 df_latest = df.copy()
-                latest_date = datetime.strptime(month_end, "%Y%m%d")
+                latest_date = _parse_trade_date(month_end)
             
             # 构建保存数据
             constituents_data = []
@@ -457,7 +469,7 @@ class DataProvider:
             save_constituents(index_code, latest_date_str, constituents_data)
             
             # 返回股票代码列表
-            ts_codes = [item["ts_code"] for item in constituents_data]
+            ts_codes = [sys.intern(item["ts_code"]) for item in constituents_data]
             logger.info(f"从Tushare获取并缓存成分股: {index_code}, 日期: {latest_date_str}, 数量: {len(ts_codes)}")
             return ts_codes
             
@@ -470,6 +482,71 @@ class DataProvider:
                 logger.error(f"get_index_constituents 失败: {error_msg}")
             return []
     
+    def _load_csv_cache(self, cache_path: Path) -> pd.DataFrame:
+        """
+        读取CSV缓存文件（向后兼容），trade_date 解析为 datetime。
+        
+        Args:
+            cache_path: CSV缓存文件路径
+            
+        Returns:
+            缓存 DataFrame
+        """
+        cached_df = pd.read_csv(cache_path, dtype={'trade_date': str})
+        cached_df['trade_date'] = pd.to_datetime(cached_df['trade_date'], format='%Y%m%d', errors='coerce')
+        return cached_df
+    
+    def _fetch_daily_range(self, ts_codes: List[str], start_date: str, end_date: str) -> List[pd.DataFrame]:
+        """
+        获取多只股票在日期区间内的日线数据（ts_code, trade_date, open, high, low, close, vol）。
+        
+        pro.daily 支持以逗号拼接多个 ts_code，单次最多返回 _DAILY_MAX_ROWS 行。
+        按区间自然日数估算每批股票数，使一批一次请求即可取全；若某批请求失败或
+        返回行数触及上限（可能被截断），该批退回逐只获取。
+        
+        Returns:
+            非空的日线 DataFrame 列表
+        """
+        from tqdm import tqdm
+        
+        span_days = (_parse_trade_date(end_date) - _parse_trade_date(start_date)).days + 1
+        batch_size = max(1, min(50, _DAILY_MAX_ROWS // max(span_days, 1)))
+        total_batches = (len(ts_codes) + batch_size - 1) // batch_size
+        
+        # API限流（从配置读取延迟）
+        try:
+            from .config_manager import ConfigManager
+            api_delay = ConfigManager.shared().get('api_rate_limit.tushare_delay', 0.1)
+        except Exception:
+            api_delay = 0.1
+        
+        def fetch(codes: str) -> Optional[pd.DataFrame]:
+            try:
+                daily_df = self._pro.daily(
+                    ts_code=codes,
+                    start_date=start_date,
+                    end_date=end_date,
+                    fields="ts_code,trade_date,open,high,low,close,vol"
+                )
+                time.sleep(api_delay)
+                return daily_df
+            except Exception as e:
+                logger.debug(f"获取 {codes} 数据失败: {e}")
+                return None
+        
+        logger.info(f"开始批量获取历史数据: {len(ts_codes)} 只股票，{total_batches} 个批次（每批 {batch_size} 只）")
+        frames = []
+        for i in tqdm(range(0, len(ts_codes), batch_size), desc="获取历史数据", ncols=80):
+            batch = ts_codes[i:i + batch_size]
+            daily_df = fetch(",".join(batch))
+            if len(batch) > 1 and (daily_df is None or len(daily_df) >= _DAILY_MAX_ROWS):
+                logger.debug(f"批量获取 {len(batch)} 只股票失败或结果可能被截断，改为逐只获取")
+                frames.extend(fetch(code) for code in batch)
+            else:
+                frames.append(daily_df)
+        
+        return [df for df in frames if df is not None and not df.empty]
+    
     def fetch_history_for_hunter(
         self,
         trade_date: str,
@@ -490,13 +567,13 @@ class DataProvider:
         Returns:
             DataFrame包含列: ts_code, trade_date, open, high, low, close, vol
         """
-        from datetime import datetime, timedelta
+        from datetime import timedelta
         
         # 如果没有指定开始日期，自动计算
         # 考虑到节假日、停牌等因素，70个自然日可能只有约40-50个交易日
         # 为了确保有60个交易日，需要获取约120个自然日的数据（约3-4个月）
         if start_date is None:
-            trade_dt = datetime.strptime(trade_date, "%Y%m%d")
+            trade_dt = _parse_trade_date(trade_date)
             start_dt = trade_dt - timedelta(days=120)  # 60个交易日约需要120个自然日
             start_date = start_dt.strftime("%Y%m%d")
         
@@ -557,33 +634,7 @@ class DataProvider:
         
         # 从API获取数据（缺失的股票或缓存未命中）
         logger.info(f"从API获取历史数据: {len(stock_list)} 只股票 ({start_date} 到 {trade_date})")
-        all_data = []
-        
-        from tqdm import tqdm
-        for ts_code in tqdm(stock_list, desc="获取历史数据", ncols=80):
-            try:
-                daily_df = self._pro.daily(
-                    ts_code=ts_code,
-                    start_date=start_date,
-                    end_date=trade_date,
-                    fields="ts_code,trade_date,open,high,low,close,vol"
-                )
-                
-                if not daily_df.empty:
-                    all_data.append(daily_df)
-                
-                # API限流（从配置读取延迟）
-                try:
-                    from .config_manager import ConfigManager
-                    config = ConfigManager()
-                    api_delay = config.get('api_rate_limit.tushare_delay', 0.1)
-                except Exception:
-                    api_delay = 0.1
-                time.sleep(api_delay)
-                
-            except Exception as e:
-                logger.debug(f"获取 {ts_code} 数据失败: {e}")
-                continue
+        all_data = self._fetch_daily_range(stock_list, start_date, trade_date)
         
         if not all_data:
             # 如果API获取失败，返回缓存数据（如果有）
@@ -639,7 +690,6 @@ class DataProvider:
         Returns:
             DataFrame包含列: ts_code, trade_date, open, high, low, close, vol, pe_ttm
         """
-        from datetime import datetime
         import os
         
         # 优先从数据库缓存读取
@@ -673,8 +723,8 @@ class DataProvider:
                         cached_df['trade_date'] = pd.to_datetime(cached_df['trade_date'], format='%Y%m%d', errors='coerce')
                         cache_start = cached_df['trade_date'].min()
                         cache_end = cached_df['trade_date'].max()
-                        req_start = datetime.strptime(start_date, '%Y%m%d')
-                        req_end = datetime.strptime(end_date, '%Y%m%d')
+                        req_start = _parse_trade_date(start_date)
+                        req_end = _parse_trade_date(end_date)
                         
                         date_covered = cache_start <= req_start and cache_end >= req_end
                     else:
@@ -709,15 +759,14 @@ class DataProvider:
         cache_path = Path("data/cache.csv")
         if use_cache and cache_path.exists() and 'cached_df' not in locals():
             try:
-                cached_df = pd.read_csv(cache_path, dtype={'trade_date': str})
-                cached_df['trade_date'] = pd.to_datetime(cached_df['trade_date'], format='%Y%m%d', errors='coerce')
+                cached_df = self._load_csv_cache(cache_path)
                 
                 # 检查缓存是否覆盖所需日期范围
                 if not cached_df.empty and 'trade_date' in cached_df.columns:
                     cache_start = cached_df['trade_date'].min()
                     cache_end = cached_df['trade_date'].max()
-                    req_start = datetime.strptime(start_date, '%Y%m%d')
-                    req_end = datetime.strptime(end_date, '%Y%m%d')
+                    req_start = _parse_trade_date(start_date)
+                    req_end = _parse_trade_date(end_date)
                     
                     if cache_start <= req_start and cache_end >= req_end:
                         # 过滤到所需日期范围
@@ -760,42 +809,8 @@ class DataProvider:
             logger.error("无法获取股票列表")
             return pd.DataFrame()
         
-        # 分批获取数据（避免API限制）
-        all_data = []
-        batch_size = 50  # 每次获取50只股票
-        total_batches = (len(stock_list) + batch_size - 1) // batch_size
-        
-        logger.info(f"开始批量获取历史数据: {len(stock_list)} 只股票，{total_batches} 个批次")
-        
-        from tqdm import tqdm
-        for i in tqdm(range(0, len(stock_list), batch_size), desc="获取历史数据", ncols=80):
-            batch_codes = stock_list[i:i + batch_size]
-            
-            # 逐个获取股票数据（Tushare API限制）
-            for ts_code in batch_codes:
-                try:
-                    daily_df = self._pro.daily(
-                        ts_code=ts_code,
-                        start_date=start_date,
-                        end_date=end_date,
-                        fields="ts_code,trade_date,open,high,low,close,vol"
-                    )
-                    
-                    if not daily_df.empty:
-                        all_data.append(daily_df)
-                    
-                    # API限流（从配置读取延迟）
-                    try:
-                        from .config_manager import ConfigManager
-                        config = ConfigManager()
-                        api_delay = config.get('api_rate_limit.tushare_delay', 0.1)
-                    except Exception:
-                        api_delay = 0.1
-                    time.sleep(api_delay)
-                    
-                except Exception as e:
-                    logger.debug(f"获取 {ts_code} 数据失败: {e}")
-                    continue
+        # 分批获取数据（多只股票合并为一次请求）
+        all_data = self._fetch_daily_range(stock_list, start_date, end_date)
         
         if not all_data:
             logger.warning("未获取到任何数据")
@@ -826,6 +841,7 @@ class DataProvider:
         # 获取所有交易日
         trade_dates = sorted(result_df['trade_date'].unique())
         
+        from tqdm import tqdm
         for trade_date in tqdm(trade_dates, desc="获取PE数据", ncols=80):
             try:
                 daily_basic = self._pro.daily_basic(
@@ -838,7 +854,7 @@ class DataProvider:
                 # API限流（从配置读取延迟）
                 try:
                     from .config_manager import ConfigManager
-                    config = ConfigManager()
+                    config = ConfigManager.shared()
                     api_delay = config.get('api_rate_limit.tushare_delay', 0.1)
                 except Exception:
                     api_delay = 0.1
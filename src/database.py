@@ -3,11 +3,12 @@ Database Module - DAAS Alpha 预测存储
 SQLite + SQLAlchemy：predictions 表及 save/update/get 方法
 """
 
+import sys
 from pathlib import Path
 from contextlib import contextmanager
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple, Union
 
-from sqlalchemy import create_engine
+from sqlalchemy import bindparam, create_engine, update
 from sqlalchemy.orm import declarative_base, sessionmaker
 
 from .logging_config import get_logger
@@ -235,21 +236,24 @@ def save_daily_predictions(list_of_dicts: List[Dict[str, Any]]) -> None:
     if not list_of_dicts:
         logger.warning("save_daily_predictions: 传入列表为空，跳过")
         return
+    rows = [
+        dict(
+            trade_date=str(d["trade_date"]),
+            ts_code=str(d["ts_code"]),
+            name=str(d["name"]),
+            ai_score=int(d["ai_score"]),
+            ai_reason=str(d.get("ai_reason", "")),
+            actual_chg=None,
+            strategy_tag=str(d.get("strategy_tag", "")) if d.get("strategy_tag") else None,
+            suggested_shares=int(d["suggested_shares"]) if d.get("suggested_shares") is not None else None,
+            price_at_prediction=float(d["price_at_prediction"]) if d.get("price_at_prediction") is not None else None,
+            current_price=None,
+        )
+        for d in list_of_dicts
+    ]
     with _session_scope() as s:
-        for d in list_of_dicts:
-            r = Prediction(
-                trade_date=str(d["trade_date"]),
-                ts_code=str(d["ts_code"]),
-                name=str(d["name"]),
-                ai_score=int(d["ai_score"]),
-                ai_reason=str(d.get("ai_reason", "")),
-                actual_chg=None,
-                strategy_tag=str(d.get("strategy_tag", "")) if d.get("strategy_tag") else None,
-                suggested_shares=int(d["suggested_shares"]) if d.get("suggested_shares") is not None else None,
-                price_at_prediction=float(d["price_at_prediction"]) if d.get("price_at_prediction") is not None else None,
-                current_price=None,
-            )
-            s.add(r)
+        # 一次 executemany 写入，避免逐条 ORM flush
+        s.bulk_insert_mappings(Prediction, rows)
     logger.info(f"save_daily_predictions: 已写入 {len(list_of_dicts)} 条")
 
 
@@ -301,8 +305,11 @@ def get_verified_predictions() -> List[Dict[str, Any]]:
     ]
 
 
-def get_all_predictions() -> List[Dict[str, Any]]:
-    """返回所有预测记录，含 trade_date, ts_code, name, ai_score, ai_reason, actual_chg, strategy_tag, suggested_shares, price_at_prediction, current_price。"""
+def get_all_predictions(as_dict: bool = False) -> Union[List[Dict[str, Any]], Dict[Tuple[str, str], Dict[str, Any]]]:
+    """
+    返回所有预测记录，含 trade_date, ts_code, name, ai_score, ai_reason, actual_chg, strategy_tag, suggested_shares, price_at_prediction, current_price。
+    as_dict=True 时返回以 (trade_date, ts_code) 为键的字典，便于按记录 O(1) 查找。
+    """
     with _session_scope() as s:
         rows = s.query(
             Prediction.trade_date,
@@ -316,7 +323,7 @@ def get_all_predictions() -> List[Dict[str, Any]]:
             Prediction.price_at_prediction,
             Prediction.current_price,
         ).all()
-    return [
+    preds = [
         {
             "trade_date": r[0],
             "ts_code": r[1],
@@ -331,6 +338,9 @@ def get_all_predictions() -> List[Dict[str, Any]]:
         }
         for r in rows
     ]
+    if as_dict:
+        return {(p["trade_date"], p["ts_code"]): p for p in preds}
+    return preds
 
 
 def update_prediction_price(trade_date: str, ts_code: str, current_price: float, return_pct: float) -> None:
@@ -347,6 +357,34 @@ def update_prediction_price(trade_date: str, ts_code: str, current_price: float,
             logger.debug(f"update_prediction_price: 未找到 trade_date={trade_date} ts_code={ts_code}")
 
 
+def update_prediction_prices_bulk(rows: List[Dict[str, Any]]) -> None:
+    """
+    批量更新预测记录的最新价格和收益率（单条 UPDATE 语句 executemany）。
+    每条 dict 需含：trade_date, ts_code, current_price, return_pct。
+    """
+    if not rows:
+        return
+    table = Prediction.__table__
+    stmt = (
+        update(table)
+        .where(table.c.trade_date == bindparam("b_trade_date"))
+        .where(table.c.ts_code == bindparam("b_ts_code"))
+        .values(current_price=bindparam("b_current_price"), actual_chg=bindparam("b_actual_chg"))
+    )
+    params = [
+        {
+            "b_trade_date": str(r["trade_date"]),
+            "b_ts_code": str(r["ts_code"]),
+            "b_current_price": float(r["current_price"]),
+            "b_actual_chg": float(r["return_pct"]),
+        }
+        for r in rows
+    ]
+    with _session_scope() as s:
+        s.execute(stmt, params)
+    logger.debug(f"update_prediction_prices_bulk: 已更新 {len(params)} 条")
+
+
 def update_prediction_price_at_prediction(trade_date: str, ts_code: str, price: float) -> None:
     """更新预测时的价格"""
     with _session_scope() as s:
@@ -673,8 +711,9 @@ def get_cached_constituents(index_code: str, trade_date: str) -> List[str]:
             if constituents:
                 # 取最新的trade_date对应的所有成分股
                 latest_date = constituents[0].trade_date
+                # 驻留代码字符串：与调用方的同名代码比较时可直接按身份命中
                 latest_constituents = [
-                    c.ts_code for c in constituents 
+                    sys.intern(c.ts_code) for c in constituents 
                     if c.trade_date == latest_date
                 ]
                 logger.debug(f"从缓存获取成分股: {index_code}, 日期: {latest_date}, 数量: {len(latest_constituents)}")
@@ -795,7 +834,9 @@ def get_cached_daily_history(
     
     try:
         with _session_scope() as s:
-            rows = s.query(DailyHistoryCache).filter(
+            # 只查询所需列（返回元组），一次查询覆盖全部股票，避免逐行构造ORM对象
+            columns = ['ts_code', 'trade_date', 'open', 'high', 'low', 'close', 'vol']
+            rows = s.query(*(getattr(DailyHistoryCache, c) for c in columns)).filter(
                 DailyHistoryCache.ts_code.in_(ts_codes),
                 DailyHistoryCache.trade_date >= start_date,
                 DailyHistoryCache.trade_date <= end_date
@@ -805,20 +846,7 @@ def get_cached_daily_history(
                 logger.debug(f"缓存中未找到历史数据: {len(ts_codes)} 只股票, {start_date} 到 {end_date}")
                 return pd.DataFrame()
             
-            # 转换为DataFrame
-            data = []
-            for row in rows:
-                data.append({
-                    'ts_code': row.ts_code,
-                    'trade_date': row.trade_date,
-                    'open': row.open,
-                    'high': row.high,
-                    'low': row.low,
-                    'close': row.close,
-                    'vol': row.vol,
-                })
-            
-            df = pd.DataFrame(data)
+            df = pd.DataFrame.from_records(rows, columns=columns)
             logger.info(f"从缓存获取历史数据: {len(df)} 条记录 ({start_date} 到 {end_date})")
             return df
     except Exception as e:
@@ -4,7 +4,6 @@ Relative Price Strength (RPS) Factor
 """
 
 import pandas as pd
-import numpy as np
 from .base import BaseFactor
 
 
@@ -65,7 +64,7 @@ class RPSFactor(BaseFactor):
             logger = get_logger(__name__)
             
             # 检查每个股票有多少条数据
-            stock_counts = df.groupby('ts_code').size()
+            stock_counts = df.groupby('ts_code', observed=True).size()
             min_count = stock_counts.min()
             max_count = stock_counts.max()
             mean_count = stock_counts.mean()
@@ -75,7 +74,7 @@ class RPSFactor(BaseFactor):
             
             # 使用 pandas 的 pct_change 方法
             # 这会自动处理每个股票组内的计算
-            df['pct_chg'] = df.groupby('ts_code')['close'].pct_change(periods=self.window) * 100
+            df['pct_chg'] = df.groupby('ts_code', observed=True)['close'].pct_change(periods=self.window) * 100
             
             # 调试信息：检查有多少股票有有效的 pct_chg
             pct_chg_valid = df['pct_chg'].notna().sum()
@@ -94,20 +93,13 @@ class RPSFactor(BaseFactor):
         # 注意：只对有效的 pct_chg 值进行排名，NaN 值会被排除
         column_name = f'rps_{self.window}'
         
-        # 对每个交易日的 pct_chg 进行排名
+        # 对每个交易日的 pct_chg 进行排名（分组rank，无需逐日Python回调）
         # rank(pct=True) 返回的是百分比排名（0-1），乘以100得到0-100的RPS值
         # method='min' 表示相同值取最小排名
-        # na_option='keep' 表示保留 NaN 值
-        def rank_pct_chg(group):
-            """对每个交易日的 pct_chg 进行百分比排名"""
-            if group.notna().sum() == 0:
-                # 如果所有值都是 NaN，返回 NaN
-                return pd.Series([np.nan] * len(group), index=group.index)
-            # 只对非 NaN 值进行排名
-            ranked = group.rank(pct=True, method='min', na_option='keep')
-            return ranked * 100
-        
-        df[column_name] = df.groupby('trade_date')['pct_chg'].transform(rank_pct_chg)
+        # na_option='keep' 表示保留 NaN 值，只对非 NaN 值排名；全为 NaN 的交易日结果为 NaN
+        df[column_name] = df.groupby('trade_date')['pct_chg'].rank(
+            pct=True, method='min', na_option='keep'
+        ) * 100
         
         # 对于历史数据不足的股票，pct_chg 和 rps 都会是 NaN，这是正常的
         
@@ -55,9 +55,11 @@ class MAFactor(BaseFactor):
         # Sort by ts_code and trade_date
         df = df.sort_values(['ts_code', 'trade_date']).reset_index(drop=True)
         
-        # Calculate moving average grouped by ts_code
-        df[f'ma_{self.window}'] = df.groupby('ts_code')['close'].transform(
-            lambda x: x.rolling(window=self.window, min_periods=1).mean()
+        # Calculate moving average grouped by ts_code (grouped rolling, no per-group Python callback)
+        df[f'ma_{self.window}'] = (
+            df.groupby('ts_code', observed=True)['close']
+            .rolling(window=self.window, min_periods=1).mean()
+            .reset_index(level=0, drop=True)
         )
         
         # Boolean indicator: close > ma
@@ -118,8 +120,10 @@ class VolumeRatioFactor(BaseFactor):
         df = df.sort_values(['ts_code', 'trade_date']).reset_index(drop=True)
         
         # Calculate rolling mean of volume grouped by ts_code
-        rolling_mean_vol = df.groupby('ts_code')['vol'].transform(
-            lambda x: x.rolling(window=self.window, min_periods=1).mean()
+        rolling_mean_vol = (
+            df.groupby('ts_code', observed=True)['vol']
+            .rolling(window=self.window, min_periods=1).mean()
+            .reset_index(level=0, drop=True)
         )
         
         # Calculate volume ratio: vol / rolling_mean(vol)
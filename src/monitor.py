@@ -215,7 +215,7 @@ def analyze_sentiment(df: pd.DataFrame, data_provider=None) -> pd.DataFrame:
     reasons_dict = {}
     try:
         from .config_manager import ConfigManager
-        config = ConfigManager()
+        config = ConfigManager.shared()
         max_workers = config.get('concurrency.ai_workers', 5)
     except Exception:
         max_workers = 5
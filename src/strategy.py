@@ -155,7 +155,7 @@ def run_screening(trade_date=None, data_provider=None, risk_budget: float = 1000
     
     try:
         from .config_manager import ConfigManager
-        config = ConfigManager()
+        config = ConfigManager.shared()
         max_workers = config.get('concurrency.atr_workers', 10)
     except Exception:
         max_workers = 10
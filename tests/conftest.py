@@ -6,9 +6,115 @@ import pytest
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from unittest.mock import Mock, MagicMock
+from unittest.mock import Mock, MagicMock, patch
+import importlib
 import os
+import time
 from pathlib import Path
+from types import MappingProxyType, SimpleNamespace
+
+
+# Frozen config values for fake_config; keys mirror config/settings.yaml
+_CONFIG_STUB = MappingProxyType({
+    'hunter.history_days': 120,
+    'api_rate_limit.tushare_delay': 0.01,
+    'api_rate_limit.retry_delay': 0.01,
+    'api_rate_limit.task_delay': 0.0,
+    'api_rate_limit.max_retries': 3,
+    'backtest.index_code': '000300.SH',
+    'backtest.initial_capital': 1000000.0,
+    'backtest.max_positions': 4,
+})
+
+
+# Screening thresholds shared by sample_settings_yaml and cached_strategy
+_SAMPLE_SETTINGS_YAML = """# Stock Screening Strategy Parameters
+
+# Valuation Filters (Value)
+pe_ttm_max: 30  # Maximum PE_TTM ratio
+pb_max: 5       # Maximum PB ratio
+
+# Quality Filters
+roe_min: 8      # Minimum ROE (percentage)
+
+# Yield Filters
+dividend_yield_min: 1.5  # Minimum dividend yield (percentage)
+
+# Exclusion Rules
+listing_days_min: 365  # Minimum days since listing (exclude new stocks)
+"""
+
+
+# Shared ts_code categories for the sample frames, so strategy merges join on integer codes
+_SAMPLE_TS_CODES = pd.CategoricalDtype(['000001.SZ', '000002.SZ', '600000.SH', '600001.SH', 'ST0001.SZ'])
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _tushare_env():
+    """Set a dummy TUSHARE_TOKEN once for the whole test session"""
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv('TUSHARE_TOKEN', 'test_token')
+        yield
+
+
+# Modules whose time.sleep calls are API rate-limit pauses
+_RATE_LIMITED_MODULES = (
+    'src.data_provider',
+    'src.data_loader',
+    'src.services.truth_service',
+    'src.api.tushare_api',
+    'src.api.eastmoney_api',
+)
+
+
+class _NoSleepTime:
+    """Stand-in for the time module whose sleep() returns immediately"""
+    
+    @staticmethod
+    def sleep(seconds):
+        pass
+    
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _no_sleep():
+    """Skip rate-limit pauses in src modules only; time.sleep elsewhere is untouched"""
+    with pytest.MonkeyPatch.context() as mp:
+        for name in _RATE_LIMITED_MODULES:
+            mp.setattr(importlib.import_module(name), 'time', _NoSleepTime())
+        yield
+
+
+@pytest.fixture(scope="module")
+def _patched_tushare():
+    """Patch the two tushare entry points DataProvider calls, once per test module"""
+    with patch('src.data_provider.ts.set_token'), \
+         patch('src.data_provider.ts.pro_api') as mock_pro_api:
+        yield mock_pro_api
+
+
+@pytest.fixture
+def mock_data_provider(_patched_tushare):
+    """DataProvider on the patched tushare module, with a fresh mocked Pro API per test"""
+    from src.data_provider import DataProvider
+    dp = DataProvider()
+    dp._pro = MagicMock()
+    return dp
+
+
+@pytest.fixture(scope="session")
+def config_manager():
+    """ConfigManager loaded once per session from config/settings.yaml (read-only)"""
+    from src.config_manager import ConfigManager
+    return ConfigManager()
+
+
+@pytest.fixture(scope="session")
+def fake_config():
+    """Dict-backed stand-in for ConfigManager, for tests that only pass config through"""
+    return SimpleNamespace(get=_CONFIG_STUB.get)
 
 
 @pytest.fixture
@@ -18,10 +124,10 @@ def mock_tushare_pro():
     return mock_pro
 
 
-@pytest.fixture
-def sample_stock_basics():
-    """Sample stock basics DataFrame"""
-    return pd.DataFrame({
+@pytest.fixture(scope="session")
+def _sample_stock_basics_frame():
+    """Sample stock basics DataFrame, built once per session; tests get a copy via sample_stock_basics"""
+    df = pd.DataFrame({
         'ts_code': ['000001.SZ', '000002.SZ', '600000.SH', '600001.SH', 'ST0001.SZ'],
         'symbol': ['000001', '000002', '600000', '600001', '000001'],
         'name': ['平安银行', '万科A', '浦发银行', '邯郸钢铁', 'ST测试'],
@@ -31,13 +137,15 @@ def sample_stock_basics():
         'is_hs': ['N', 'Y', 'Y', 'N', 'N'],
         'is_st': [False, False, False, False, True]
     })
+    df['ts_code'] = df['ts_code'].astype(_SAMPLE_TS_CODES)
+    return df
 
 
-@pytest.fixture
-def sample_daily_indicators():
-    """Sample daily indicators DataFrame"""
+@pytest.fixture(scope="session")
+def _sample_daily_indicators_frame():
+    """Sample daily indicators DataFrame, built once per session; tests get a copy via sample_daily_indicators"""
     trade_date = datetime.now().strftime('%Y%m%d')
-    return pd.DataFrame({
+    df = pd.DataFrame({
         'ts_code': ['000001.SZ', '000002.SZ', '600000.SH', '600001.SH'],
         'trade_date': [trade_date] * 4,
         'pe_ttm': [8.5, 12.3, 6.2, 25.5],
@@ -45,18 +153,41 @@ def sample_daily_indicators():
         'dividend_yield': [2.5, 3.2, 1.8, 0.5],
         'total_market_cap': [1500000, 2000000, 1200000, 800000]  # 万元
     })
+    df['ts_code'] = df['ts_code'].astype(_SAMPLE_TS_CODES)
+    return df
 
 
-@pytest.fixture
-def sample_financial_indicators():
-    """Sample financial indicators DataFrame"""
+@pytest.fixture(scope="session")
+def _sample_financial_indicators_frame():
+    """Sample financial indicators DataFrame, built once per session; tests get a copy via sample_financial_indicators"""
     end_date = datetime.now().strftime('%Y%m%d')
-    return pd.DataFrame({
+    df = pd.DataFrame({
         'ts_code': ['000001.SZ', '000002.SZ', '600000.SH', '600001.SH'],
         'end_date': [end_date] * 4,
         'roe': [12.5, 15.8, 10.2, 5.5],
         'net_profit_growth_rate': [8.5, 12.3, 6.2, -2.1]
     })
+    df['ts_code'] = df['ts_code'].astype(_SAMPLE_TS_CODES)
+    return df
+
+
+# Each test gets its own copy, so in-place edits never leak into the session frames
+@pytest.fixture
+def sample_stock_basics(_sample_stock_basics_frame):
+    """Sample stock basics DataFrame"""
+    return _sample_stock_basics_frame.copy()
+
+
+@pytest.fixture
+def sample_daily_indicators(_sample_daily_indicators_frame):
+    """Sample daily indicators DataFrame"""
+    return _sample_daily_indicators_frame.copy()
+
+
+@pytest.fixture
+def sample_financial_indicators(_sample_financial_indicators_frame):
+    """Sample financial indicators DataFrame"""
+    return _sample_financial_indicators_frame.copy()
 
 
 @pytest.fixture
@@ -142,22 +273,31 @@ def temp_output_dir(tmp_path):
 def sample_settings_yaml(temp_config_dir):
     """Create sample settings.yaml file"""
     settings_file = temp_config_dir / 'settings.yaml'
-    settings_file.write_text("""# Stock Screening Strategy Parameters
+    settings_file.write_text(_SAMPLE_SETTINGS_YAML, encoding='utf-8')
+    return str(settings_file)
 
-# Valuation Filters (Value)
-pe_ttm_max: 30  # Maximum PE_TTM ratio
-pb_max: 5       # Maximum PB ratio
 
-# Quality Filters
-roe_min: 8      # Minimum ROE (percentage)
+@pytest.fixture(scope="session")
+def cached_strategy(tmp_path_factory):
+    """StockStrategy on the sample thresholds, built once per session"""
+    from src.strategy import StockStrategy
+    settings_file = tmp_path_factory.mktemp('config') / 'settings.yaml'
+    settings_file.write_text(_SAMPLE_SETTINGS_YAML, encoding='utf-8')
+    return StockStrategy(config_path=str(settings_file))
 
-# Yield Filters
-dividend_yield_min: 1.5  # Minimum dividend yield (percentage)
 
-# Exclusion Rules
-listing_days_min: 365  # Minimum days since listing (exclude new stocks)
-""", encoding='utf-8')
-    return str(settings_file)
+@pytest.fixture(scope="session")
+def _cached_filter_frame(cached_strategy, _sample_stock_basics_frame, _sample_daily_indicators_frame,
+                         _sample_financial_indicators_frame):
+    """filter_stocks output on the sample frames, computed once per session"""
+    return cached_strategy.filter_stocks(_sample_stock_basics_frame, _sample_daily_indicators_frame,
+                                         _sample_financial_indicators_frame)
+
+
+@pytest.fixture
+def cached_filter_result(_cached_filter_frame):
+    """Copy of the session's filter_stocks output"""
+    return _cached_filter_frame.copy()
 
 
 @pytest.fixture
@@ -214,3 +354,44 @@ def trade_date():
     while date.weekday() >= 5:  # Skip weekends
         date -= timedelta(days=1)
     return date.strftime('%Y%m%d')
+
+
+@pytest.fixture(scope="session")
+def _shared_test_db(tmp_path_factory):
+    """Point src.database at one in-memory engine for the whole session, schema created once"""
+    import src.database
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+    
+    # StaticPool reuses a single connection, so the in-memory DB outlives each session
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    src.database.Base.metadata.create_all(engine)
+    
+    with pytest.MonkeyPatch.context() as mp:
+        # Keep _DB_PATH off the real data/daas.db for any code that reads it
+        mp.setattr(src.database, '_DB_PATH', tmp_path_factory.mktemp("db") / "test_daas.db")
+        mp.setattr(src.database, '_engine', engine)
+        mp.setattr(src.database, '_SessionLocal', sessionmaker(
+            bind=engine,
+            autoflush=False,
+            autocommit=False
+        ))
+        yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def clean_db(_shared_test_db):
+    """Shared test database, emptied after each test instead of rebuilt"""
+    from src.database import Base
+    
+    yield _shared_test_db
+    
+    with _shared_test_db.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(table.delete())
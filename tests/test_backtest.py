@@ -107,8 +107,7 @@ class TestCalculateReturns:
     @pytest.fixture
     def sample_data_with_signals(self):
         """Create sample data with buy signals"""
-        dates = pd.date_range('2024-01-01', periods=20, freq='D')
-        dates = [d for d in dates if d.weekday() < 5]  # Only weekdays
+        dates = pd.bdate_range('2024-01-01', '2024-01-20')  # Only weekdays
         
         data = []
         for ts_code in ['000001.SZ']:
@@ -335,8 +334,7 @@ class TestRun:
     @pytest.fixture
     def sample_history_data(self):
         """Create sample history data for backtesting"""
-        dates = pd.date_range('2024-01-01', periods=100, freq='D')
-        dates = [d for d in dates if d.weekday() < 5]  # Only weekdays
+        dates = pd.bdate_range('2024-01-01', '2024-04-09')  # Only weekdays
         
         data = []
         for ts_code in ['000001.SZ']:
@@ -17,8 +17,7 @@ class TestReturnCalculationAccuracy:
     @pytest.fixture
     def sample_trade_data(self):
         """Create sample data for manual return verification"""
-        dates = pd.date_range('2024-01-01', periods=20, freq='D')
-        dates = [d for d in dates if d.weekday() < 5]
+        dates = pd.bdate_range('2024-01-01', '2024-01-20')
         
         data = []
         for ts_code in ['000001.SZ']:
@@ -71,8 +70,7 @@ class TestReturnCalculationAccuracy:
     def test_return_calculation_t_plus_one_logic(self):
         """Test T+1 Open buy, T+1+N Close sell logic"""
         # Create specific data to test timing
-        dates = pd.date_range('2024-01-01', periods=15, freq='D')
-        dates = [d for d in dates if d.weekday() < 5]
+        dates = pd.bdate_range('2024-01-01', '2024-01-15')
         
         data = []
         for i, date in enumerate(dates):
@@ -6,47 +6,53 @@ Tests complete flow: fetch_history_batch → FactorPipeline → VectorBacktester
 import pytest
 import pandas as pd
 import numpy as np
-from unittest.mock import Mock, MagicMock, patch
+from unittest.mock import Mock, patch
 from datetime import datetime, timedelta
 
-from src.data_provider import DataProvider
 from src.backtest import VectorBacktester
 
 
 class TestBacktestWorkflow:
     """Test complete Backtest workflow"""
     
-    @pytest.fixture
-    def mock_data_provider(self):
-        """Create mocked DataProvider"""
-        with patch('src.data_provider.ts'), \
-             patch.dict('os.environ', {'TUSHARE_TOKEN': 'test_token'}):
-            dp = DataProvider()
-            dp._pro = MagicMock()
-            return dp
+    @staticmethod
+    @pytest.fixture(scope="class")
+    def sample_history_data():
+        """Create sample history data for backtesting (shared read-only; copy() before mutating)"""
+        ts_codes = ['000001.SZ', '000002.SZ']
+        dates = pd.bdate_range('2024-01-01', periods=80)  # 80 weekdays
+        date_strs = dates.strftime('%Y%m%d').to_numpy()
+        
+        # Build columns vectorized: every stock shares the same price path
+        base = np.tile(10.0 + np.arange(len(dates)) * 0.1, len(ts_codes))
+        n_rows = len(base)
+        
+        # Seeded generator: noise vectors drawn in one call each, reproducible across runs
+        rng = np.random.default_rng(42)
+        
+        return pd.DataFrame({
+            'ts_code': np.repeat(ts_codes, len(dates)),
+            'trade_date': np.tile(date_strs, len(ts_codes)),
+            'open': base,
+            'high': base + 0.2,
+            'low': base - 0.1,
+            'close': base + 0.05,
+            'vol': 1000000 + rng.integers(-100000, 100000, size=n_rows),
+            'pe_ttm': 15.0 + rng.normal(0, 5, size=n_rows)
+        })
     
     @pytest.fixture
-    def sample_history_data(self):
-        """Create sample history data for backtesting"""
-        dates = pd.date_range('2024-01-01', periods=100, freq='D')
-        dates = [d for d in dates if d.weekday() < 5][:80]  # 80 weekdays
-        
-        data = []
-        for ts_code in ['000001.SZ', '000002.SZ']:
-            for i, date in enumerate(dates):
-                data.append({
-                    'ts_code': ts_code,
-                    'trade_date': date.strftime('%Y%m%d'),
-                    'open': 10.0 + i * 0.1,
-                    'high': 10.0 + i * 0.1 + 0.2,
-                    'low': 10.0 + i * 0.1 - 0.1,
-                    'close': 10.0 + i * 0.1 + 0.05,
-                    'vol': 1000000 + np.random.randint(-100000, 100000),
-                    'pe_ttm': 15.0 + np.random.normal(0, 5)
-                })
-        
-        return pd.DataFrame(data)
+    def skip_portfolio_simulation(self):
+        """Stub out the day-by-day portfolio simulation for tests that only check factors/metrics structure"""
+        empty_portfolio = {
+            'equity_curve': pd.Series(dtype=float),
+            'trades': pd.DataFrame(),
+            'stock_contributions': {}
+        }
+        with patch.object(VectorBacktester, '_simulate_portfolio', return_value=empty_portfolio) as mock_simulate:
+            yield mock_simulate
     
+    @pytest.mark.integration
     def test_backtest_workflow_complete(self, mock_data_provider, sample_history_data):
         """Test complete backtest workflow"""
         # Step 1: fetch_history_batch (simulated - using sample data)
@@ -72,6 +78,7 @@ class TestBacktestWorkflow:
         trades = results['trades']
         assert isinstance(trades, pd.DataFrame)
     
+    @pytest.mark.integration
     def test_backtest_workflow_data_integrity(self, sample_history_data):
         """Test that data integrity is maintained through workflow"""
         initial_count = len(sample_history_data)
@@ -84,36 +91,34 @@ class TestBacktestWorkflow:
         if not trades.empty:
             assert len(trades) <= initial_count
     
-    def test_backtest_workflow_factor_computation(self, sample_history_data):
+    def test_backtest_workflow_factor_computation(self, sample_history_data, skip_portfolio_simulation):
         """Test that factors are computed correctly in backtest"""
         backtester = VectorBacktester()
         
         # Run backtest
         results = backtester.run(sample_history_data.copy(), holding_days=5)
         
-        # Verify that factor pipeline was used
+        # Verify that factor pipeline was used and its output reached the simulation
         assert len(backtester.factor_pipeline) == 4
+        signal_df = skip_portfolio_simulation.call_args[0][0]
+        assert {'rps_60', 'above_ma_20', 'vol_ratio_5', 'is_undervalued', 'buy_signal'} <= set(signal_df.columns)
         
         # Verify metrics are calculated
         strategy_metrics = results['strategy_metrics']
         assert isinstance(strategy_metrics['win_rate'], (int, float))
         assert isinstance(strategy_metrics['total_return'], (int, float))
     
-    def test_backtest_workflow_different_holding_days(self, sample_history_data):
+    @pytest.mark.integration
+    @pytest.mark.parametrize("holding_days", [3, 5, 10])
+    def test_backtest_workflow_different_holding_days(self, sample_history_data, holding_days):
         """Test backtest with different holding_days"""
         backtester = VectorBacktester()
         
-        results_3 = backtester.run(sample_history_data.copy(), holding_days=3)
-        results_5 = backtester.run(sample_history_data.copy(), holding_days=5)
-        results_10 = backtester.run(sample_history_data.copy(), holding_days=10)
+        results = backtester.run(sample_history_data.copy(), holding_days=holding_days)
         
-        # All should complete successfully
-        assert 'strategy_metrics' in results_3
-        assert 'strategy_metrics' in results_5
-        assert 'strategy_metrics' in results_10
-        
-        # Trades count may differ based on holding_days
-        # (shorter holding_days may have more valid trades)
+        # Should complete successfully
+        # (trades count may differ based on holding_days)
+        assert 'strategy_metrics' in results
     
     def test_backtest_workflow_empty_data(self):
         """Test backtest with empty data"""
@@ -125,7 +130,8 @@ class TestBacktestWorkflow:
         assert 'trades' in results
         assert results['trades'].empty
     
-    def test_backtest_workflow_benchmark_integration(self, mock_data_provider, sample_history_data):
+    def test_backtest_workflow_benchmark_integration(self, mock_data_provider, sample_history_data,
+                                                     skip_portfolio_simulation):
         """Test benchmark data integration"""
         # Mock benchmark data
         mock_index_df = pd.DataFrame({
@@ -3,6 +3,7 @@ Configuration Management Regression Tests
 验证配置读取、默认值、降级处理
 """
 
+import os
 import pytest
 import yaml
 from pathlib import Path
@@ -21,28 +22,22 @@ class TestConfigManagerRegression:
         assert config.config is not None
         assert isinstance(config.config, dict)
     
-    def test_config_manager_get_existing_key(self):
+    def test_config_manager_get_existing_key(self, config_manager):
         """测试获取存在的配置项"""
-        config = ConfigManager()
-        
         # 测试获取嵌套配置
-        index_code = config.get('index_filter.index_code')
+        index_code = config_manager.get('index_filter.index_code')
         assert index_code is not None
     
-    def test_config_manager_get_with_default(self):
+    def test_config_manager_get_with_default(self, config_manager):
         """测试获取不存在的配置项时使用默认值"""
-        config = ConfigManager()
-        
         # 测试不存在的配置项
-        non_existent = config.get('non_existent.key', 'default_value')
+        non_existent = config_manager.get('non_existent.key', 'default_value')
         assert non_existent == 'default_value'
     
-    def test_config_manager_nested_keys(self):
+    def test_config_manager_nested_keys(self, config_manager):
         """测试嵌套键访问"""
-        config = ConfigManager()
-        
         # 测试点号分隔的嵌套键
-        enabled = config.get('index_filter.enabled', True)
+        enabled = config_manager.get('index_filter.enabled', True)
         assert isinstance(enabled, bool)
     
     def test_config_manager_reload(self):
@@ -58,32 +53,79 @@ class TestConfigManagerRegression:
         # 值应该保持一致（除非配置文件被修改）
         reloaded_value = config.get('index_filter.index_code')
         assert reloaded_value == original_value
+    
+    def test_config_manager_instances_do_not_share_cached_dict(self):
+        """测试解析缓存不会在实例间共享可变配置"""
+        first = ConfigManager()
+        second = ConfigManager()
+        
+        assert first.config == second.config
+        assert first.config is not second.config
+        
+        first.config['index_filter'] = None
+        assert second.get('index_filter.index_code') is not None
+    
+    def test_config_manager_set_visible_to_get(self):
+        """测试set()覆盖的配置可以通过get()读取（含自动创建的中间层级）"""
+        config = ConfigManager()
+        
+        config.set('strategy.alpha_trident.rps_threshold', 99)
+        assert config.get('strategy.alpha_trident.rps_threshold') == 99
+        assert config.config['strategy']['alpha_trident']['rps_threshold'] == 99
+        
+        config.set('non_existent_section.nested.value', 7)
+        assert config.get('non_existent_section.nested.value') == 7
+        assert config.get('non_existent_section.nested') == {'value': 7}
+    
+    def test_config_manager_shared_instance(self):
+        """测试共享实例复用与reset()"""
+        ConfigManager.reset()
+        shared = ConfigManager.shared()
+        
+        assert ConfigManager.shared() is shared
+        assert ConfigManager() is not shared
+        
+        ConfigManager.reset()
+        assert ConfigManager.shared() is not shared
+    
+    def test_config_manager_shared_sees_file_changes(self, tmp_path):
+        """测试配置文件修改后shared()返回新值"""
+        settings = tmp_path / 'settings.yaml'
+        settings.write_text('strategy:\n  rps_threshold: 85\n', encoding='utf-8')
+        
+        shared = ConfigManager.shared(str(settings))
+        assert shared.get('strategy.rps_threshold') == 85
+        assert ConfigManager.shared(str(settings)) is shared
+        
+        settings.write_text('strategy:\n  rps_threshold: 90\n', encoding='utf-8')
+        # 文件系统mtime精度可能较粗，显式推进mtime确保被识别为修改
+        st = settings.stat()
+        os.utime(settings, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+        
+        assert ConfigManager.shared(str(settings)).get('strategy.rps_threshold') == 90
+        assert ConfigManager(str(settings)).get('strategy.rps_threshold') == 90
 
 
 class TestNewConfigItems:
     """测试新增配置项"""
     
-    def test_concurrency_config(self):
+    def test_concurrency_config(self, config_manager):
         """测试并发配置读取"""
-        config = ConfigManager()
-        
-        roe_workers = config.get('concurrency.roe_workers', 10)
-        ai_workers = config.get('concurrency.ai_workers', 5)
-        atr_workers = config.get('concurrency.atr_workers', 10)
+        roe_workers = config_manager.get('concurrency.roe_workers', 10)
+        ai_workers = config_manager.get('concurrency.ai_workers', 5)
+        atr_workers = config_manager.get('concurrency.atr_workers', 10)
         
         assert roe_workers > 0
         assert ai_workers > 0
         assert atr_workers > 0
     
-    def test_api_rate_limit_config(self):
+    def test_api_rate_limit_config(self, config_manager):
         """测试API限流配置读取"""
-        config = ConfigManager()
-        
-        tushare_delay = config.get('api_rate_limit.tushare_delay', 0.1)
-        eastmoney_delay = config.get('api_rate_limit.eastmoney_delay', 0.2)
-        retry_delay = config.get('api_rate_limit.retry_delay', 0.5)
-        task_delay = config.get('api_rate_limit.task_delay', 0.02)
-        max_retries = config.get('api_rate_limit.max_retries', 3)
+        tushare_delay = config_manager.get('api_rate_limit.tushare_delay', 0.1)
+        eastmoney_delay = config_manager.get('api_rate_limit.eastmoney_delay', 0.2)
+        retry_delay = config_manager.get('api_rate_limit.retry_delay', 0.5)
+        task_delay = config_manager.get('api_rate_limit.task_delay', 0.02)
+        max_retries = config_manager.get('api_rate_limit.max_retries', 3)
         
         assert tushare_delay > 0
         assert eastmoney_delay > 0
@@ -91,72 +133,60 @@ class TestNewConfigItems:
         assert task_delay > 0
         assert max_retries > 0
     
-    def test_strategy_config(self):
+    def test_strategy_config(self, config_manager):
         """测试策略配置读取"""
-        config = ConfigManager()
-        
-        rps_threshold = config.get('strategy.alpha_trident.rps_threshold', 85)
-        vol_ratio_threshold = config.get('strategy.alpha_trident.vol_ratio_threshold', 1.5)
-        pe_max = config.get('strategy.alpha_trident.pe_max', 30)
+        rps_threshold = config_manager.get('strategy.alpha_trident.rps_threshold', 85)
+        vol_ratio_threshold = config_manager.get('strategy.alpha_trident.vol_ratio_threshold', 1.5)
+        pe_max = config_manager.get('strategy.alpha_trident.pe_max', 30)
         
         assert rps_threshold > 0
         assert vol_ratio_threshold > 0
         assert pe_max > 0
     
-    def test_backtest_config(self):
+    def test_backtest_config(self, config_manager):
         """测试回测配置读取"""
-        config = ConfigManager()
-        
-        index_code = config.get('backtest.index_code', '000300.SH')
-        initial_capital = config.get('backtest.initial_capital', 1000000.0)
-        max_positions = config.get('backtest.max_positions', 4)
+        index_code = config_manager.get('backtest.index_code', '000300.SH')
+        initial_capital = config_manager.get('backtest.initial_capital', 1000000.0)
+        max_positions = config_manager.get('backtest.max_positions', 4)
         
         assert index_code is not None
         assert initial_capital > 0
         assert max_positions > 0
     
-    def test_factors_config(self):
+    def test_factors_config(self, config_manager):
         """测试因子配置读取"""
-        config = ConfigManager()
-        
-        rps_window = config.get('factors.rps.window', 60)
-        ma_window = config.get('factors.ma.window', 20)
-        volume_ratio_window = config.get('factors.volume_ratio.window', 5)
-        pe_max = config.get('factors.pe.max', 30)
+        rps_window = config_manager.get('factors.rps.window', 60)
+        ma_window = config_manager.get('factors.ma.window', 20)
+        volume_ratio_window = config_manager.get('factors.volume_ratio.window', 5)
+        pe_max = config_manager.get('factors.pe.max', 30)
         
         assert rps_window > 0
         assert ma_window > 0
         assert volume_ratio_window > 0
         assert pe_max > 0
     
-    def test_hunter_config(self):
+    def test_hunter_config(self, config_manager):
         """测试Hunter配置读取"""
-        config = ConfigManager()
-        
-        history_days = config.get('hunter.history_days', 120)
+        history_days = config_manager.get('hunter.history_days', 120)
         assert history_days > 0
 
 
 class TestConfigDefaultValues:
     """测试配置默认值处理"""
     
-    def test_config_defaults_when_missing(self):
+    def test_config_defaults_when_missing(self, config_manager):
         """测试配置缺失时使用默认值"""
-        config = ConfigManager()
-        
         # 测试不存在的配置项使用默认值
-        default_workers = config.get('concurrency.non_existent_workers', 10)
+        default_workers = config_manager.get('concurrency.non_existent_workers', 10)
         assert default_workers == 10
         
-        default_threshold = config.get('strategy.non_existent.threshold', 85)
+        default_threshold = config_manager.get('strategy.non_existent.threshold', 85)
         assert default_threshold == 85
     
-    def test_config_none_handling(self):
+    def test_config_none_handling(self, config_manager):
         """测试配置值为None时的处理"""
-        config = ConfigManager()
-        
         # 如果配置值为None，应该返回默认值
-        value = config.get('some.none.value', 'default')
+        value = config_manager.get('some.none.value', 'default')
         # 如果配置不存在或为None，应该返回默认值
         assert value == 'default' or value is not None
 
@@ -164,26 +194,22 @@ class TestConfigDefaultValues:
 class TestConfigBackwardCompatibility:
     """测试配置向后兼容性"""
     
-    def test_existing_config_still_works(self):
+    def test_existing_config_still_works(self, config_manager):
         """测试现有配置仍然可用"""
-        config = ConfigManager()
-        
         # 验证原有配置项仍然可以读取
-        pe_ttm_max = config.get('pe_ttm_max', 30)
-        pb_max = config.get('pb_max', 5)
-        roe_min = config.get('roe_min', 8)
+        pe_ttm_max = config_manager.get('pe_ttm_max', 30)
+        pb_max = config_manager.get('pb_max', 5)
+        roe_min = config_manager.get('roe_min', 8)
         
         assert pe_ttm_max > 0
         assert pb_max > 0
         assert roe_min > 0
     
-    def test_index_filter_config_compatibility(self):
+    def test_index_filter_config_compatibility(self, config_manager):
         """测试指数过滤配置兼容性"""
-        config = ConfigManager()
-        
-        enabled = config.get('index_filter.enabled', True)
-        index_code = config.get('index_filter.index_code', '000852.SH')
-        fallback_to_all = config.get('index_filter.fallback_to_all', False)
+        enabled = config_manager.get('index_filter.enabled', True)
+        index_code = config_manager.get('index_filter.index_code', '000852.SH')
+        fallback_to_all = config_manager.get('index_filter.fallback_to_all', False)
         
         assert isinstance(enabled, bool)
         assert index_code is not None
@@ -9,6 +9,12 @@ import os
 from src.data_loader import DataLoader
 
 
+@pytest.fixture(autouse=True)
+def _reset_data_loader():
+    """Drop DataLoader's cached Tushare handle so each test sees its own patched ts"""
+    DataLoader.reset()
+
+
 class TestDataLoaderInit:
     """Test DataLoader initialization"""
     
@@ -26,7 +32,19 @@ class TestDataLoaderInit:
         mock_ts.set_token.assert_called_once_with('test_token_12345')
         mock_ts.pro_api.assert_called_once()
         assert loader.pro == mock_pro
-    
+
+    @patch('src.data_loader.load_dotenv')
+    @patch('src.data_loader.ts')
+    @patch.dict(os.environ, {'TUSHARE_TOKEN': 'test_token_12345'})
+    def test_init_reuses_pro_handle(self, mock_ts, mock_load_dotenv):
+        """Test that the Tushare Pro handle and .env load are shared across instances"""
+        first = DataLoader()
+        second = DataLoader()
+
+        assert first.pro is second.pro
+        mock_load_dotenv.assert_called_once()
+        mock_ts.pro_api.assert_called_once()
+
     @patch('src.data_loader.load_dotenv')
     @patch.dict(os.environ, {}, clear=True)
     def test_init_without_token(self, mock_load_dotenv):
@@ -42,8 +60,7 @@ class TestGetStockBasics:
     def loader(self, mock_tushare_pro):
         """Create DataLoader with mocked Tushare Pro"""
         with patch('src.data_loader.load_dotenv'), \
-             patch('src.data_loader.ts') as mock_ts, \
-             patch.dict(os.environ, {'TUSHARE_TOKEN': 'test_token'}):
+             patch('src.data_loader.ts') as mock_ts:
             mock_ts.pro_api.return_value = mock_tushare_pro
             return DataLoader()
     
@@ -63,6 +80,8 @@ class TestGetStockBasics:
         assert isinstance(result, pd.DataFrame)
         assert 'is_st' in result.columns
         assert len(result) == len(mock_response)
+        for col in ('ts_code', 'industry', 'area', 'is_hs'):
+            assert isinstance(result[col].dtype, pd.CategoricalDtype)
     
     def test_get_stock_basics_st_detection(self, loader, mock_tushare_pro):
         """Test ST stock detection"""
@@ -99,8 +118,7 @@ class TestGetDailyIndicators:
     def loader(self, mock_tushare_pro):
         """Create DataLoader with mocked Tushare Pro"""
         with patch('src.data_loader.load_dotenv'), \
-             patch('src.data_loader.ts') as mock_ts, \
-             patch.dict(os.environ, {'TUSHARE_TOKEN': 'test_token'}):
+             patch('src.data_loader.ts') as mock_ts:
             mock_ts.pro_api.return_value = mock_tushare_pro
             return DataLoader()
     
@@ -145,9 +163,7 @@ class TestGetFinancialIndicators:
     def loader(self, mock_tushare_pro):
         """Create DataLoader with mocked Tushare Pro"""
         with patch('src.data_loader.load_dotenv'), \
-             patch('src.data_loader.ts') as mock_ts, \
-             patch('src.data_loader.time.sleep'), \
-             patch.dict(os.environ, {'TUSHARE_TOKEN': 'test_token'}):
+             patch('src.data_loader.ts') as mock_ts:
             mock_ts.pro_api.return_value = mock_tushare_pro
             return DataLoader()
     
@@ -268,9 +284,7 @@ class TestGetNotices:
         """Create DataLoader with mocked Tushare Pro"""
         with patch('src.data_loader.load_dotenv'), \
              patch('src.data_loader.ts') as mock_ts, \
-             patch('src.data_loader.time.sleep'), \
-             patch('src.data_loader.datetime') as mock_datetime, \
-             patch.dict(os.environ, {'TUSHARE_TOKEN': 'test_token'}):
+             patch('src.data_loader.datetime') as mock_datetime:
             from datetime import datetime
             mock_datetime.now.return_value.strftime.return_value = '20250116'
             mock_ts.pro_api.return_value = mock_tushare_pro
@@ -325,8 +339,7 @@ class TestAPIErrorHandling:
     def loader(self, mock_tushare_pro):
         """Create DataLoader with mocked Tushare Pro"""
         with patch('src.data_loader.load_dotenv'), \
-             patch('src.data_loader.ts') as mock_ts, \
-             patch.dict(os.environ, {'TUSHARE_TOKEN': 'test_token'}):
+             patch('src.data_loader.ts') as mock_ts:
             mock_ts.pro_api.return_value = mock_tushare_pro
             return DataLoader()
     
@@ -6,6 +6,7 @@ Tests for new methods: get_all_predictions, update_prediction_price, update_pred
 
 import pytest
 import pandas as pd
+from dataclasses import dataclass
 from pathlib import Path
 import tempfile
 import shutil
@@ -14,47 +15,136 @@ from src.database import (
     save_daily_predictions,
     get_all_predictions,
     update_prediction_price,
+    update_prediction_prices_bulk,
     update_prediction_price_at_prediction,
     Prediction,
     _session_scope
 )
 
 
+def _prediction(ts_code, name, **extra):
+    """Minimal prediction row for 20240101"""
+    return {"trade_date": "20240101", "ts_code": ts_code, "name": name,
+            "ai_score": 0, "ai_reason": "Test", **extra}
+
+
+@dataclass(frozen=True)
+class _PriceScenario:
+    """Predictions to save, updates to apply in order, and the expected fields per (trade_date, ts_code)"""
+    name: str
+    predictions: list
+    updates: list
+    expected: dict
+
+
+_PRICE_SCENARIOS = [
+    _PriceScenario(
+        name="current_price",
+        predictions=[_prediction("000001.SZ", "测试股票", price_at_prediction=10.0)],
+        updates=[(update_prediction_price, ("20240101", "000001.SZ", 11.0, 10.0))],
+        expected={("20240101", "000001.SZ"): {"current_price": 11.0, "actual_chg": 10.0}},
+    ),
+    _PriceScenario(
+        name="price_at_prediction",
+        predictions=[_prediction("000001.SZ", "测试股票")],
+        updates=[(update_prediction_price_at_prediction, ("20240101", "000001.SZ", 10.5))],
+        expected={("20240101", "000001.SZ"): {"price_at_prediction": 10.5}},
+    ),
+    # Updating a missing prediction must not raise and must not create a row
+    _PriceScenario(
+        name="nonexistent",
+        predictions=[],
+        updates=[
+            (update_prediction_price, ("20240101", "999999.SZ", 10.0, 5.0)),
+            (update_prediction_price_at_prediction, ("20240101", "999999.SZ", 10.0)),
+        ],
+        expected={},
+    ),
+    # save -> update price_at_prediction -> update current_price
+    _PriceScenario(
+        name="workflow",
+        predictions=[_prediction("000001.SZ", "测试股票")],
+        updates=[
+            (update_prediction_price_at_prediction, ("20240101", "000001.SZ", 10.0)),
+            (update_prediction_price, ("20240101", "000001.SZ", 11.0, 10.0)),
+        ],
+        expected={("20240101", "000001.SZ"): {
+            "price_at_prediction": 10.0, "current_price": 11.0, "actual_chg": 10.0}},
+    ),
+    _PriceScenario(
+        name="bulk",
+        predictions=[
+            _prediction("000001.SZ", "股票1", price_at_prediction=10.0),
+            _prediction("000002.SZ", "股票2", price_at_prediction=20.0),
+        ],
+        updates=[(update_prediction_prices_bulk, ([
+            {"trade_date": "20240101", "ts_code": "000001.SZ", "current_price": 11.0, "return_pct": 10.0},
+            {"trade_date": "20240101", "ts_code": "000002.SZ", "current_price": 18.0, "return_pct": -10.0},
+        ],))],
+        expected={
+            ("20240101", "000001.SZ"): {"current_price": 11.0, "actual_chg": 10.0},
+            ("20240101", "000002.SZ"): {"current_price": 18.0, "actual_chg": -10.0},
+        },
+    ),
+]
+
+
 class TestDatabaseV12Fields:
     """Test new database fields in v1.2"""
     
-    @pytest.fixture(autouse=True)
-    def setup_test_db(self, tmp_path, monkeypatch):
-        """Setup test database"""
-        # Create temporary database
-        test_db_path = tmp_path / "test_daas.db"
-        test_data_dir = tmp_path / "data"
-        test_data_dir.mkdir()
+    @staticmethod
+    @pytest.fixture(scope="class")
+    def db_engine():
+        """In-memory test database with the schema created once per class"""
+        from sqlalchemy import create_engine, event
+        from sqlalchemy.pool import StaticPool
+        from src.database import Base
         
-        # Patch database path
-        import src.database
-        original_db_path = src.database._DB_PATH
-        src.database._DB_PATH = test_db_path
+        # StaticPool reuses a single connection, so the in-memory DB outlives each session
+        engine = create_engine(
+            "sqlite://",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool
+        )
+        
+        # pysqlite defers BEGIN until the first DML, which breaks SAVEPOINT;
+        # let SQLAlchemy emit BEGIN itself
+        @event.listens_for(engine, "connect")
+        def _no_driver_transactions(dbapi_connection, connection_record):
+            dbapi_connection.isolation_level = None
+        
+        @event.listens_for(engine, "begin")
+        def _emit_begin(conn):
+            conn.exec_driver_sql("BEGIN")
         
-        # Recreate engine and tables
-        from sqlalchemy import create_engine
+        Base.metadata.create_all(engine)
+        yield engine
+        engine.dispose()
+    
+    @pytest.fixture(autouse=True)
+    def setup_test_db(self, db_engine, tmp_path, monkeypatch):
+        """Run each test inside an outer transaction that is rolled back afterwards"""
+        import src.database
         from sqlalchemy.orm import sessionmaker
-        src.database._engine = create_engine(
-            f"sqlite:///{test_db_path}",
-            connect_args={"check_same_thread": False}
-        )
-        src.database._SessionLocal = sessionmaker(
-            bind=src.database._engine,
+        
+        # Keep _DB_PATH off the real data/daas.db for any code that reads it
+        monkeypatch.setattr(src.database, '_DB_PATH', tmp_path / "test_daas.db")
+        
+        connection = db_engine.connect()
+        transaction = connection.begin()
+        # Session commits inside _session_scope become SAVEPOINT releases
+        monkeypatch.setattr(src.database, '_engine', db_engine)
+        monkeypatch.setattr(src.database, '_SessionLocal', sessionmaker(
+            bind=connection,
             autoflush=False,
-            autocommit=False
-        )
-        from src.database import Base
-        Base.metadata.create_all(src.database._engine)
+            autocommit=False,
+            join_transaction_mode="create_savepoint"
+        ))
         
         yield
         
-        # Restore original
-        src.database._DB_PATH = original_db_path
+        transaction.rollback()
+        connection.close()
     
     def test_save_with_price_at_prediction(self):
         """Test saving predictions with price_at_prediction"""
@@ -131,135 +221,29 @@ class TestDatabaseV12Fields:
             assert "price_at_prediction" in pred
             assert "current_price" in pred
     
-    def test_update_prediction_price(self):
-        """Test updating current_price and actual_chg"""
-        # Save initial prediction
-        predictions = [
-            {
-                "trade_date": "20240101",
-                "ts_code": "000001.SZ",
-                "name": "测试股票",
-                "ai_score": 0,
-                "ai_reason": "Test",
-                "price_at_prediction": 10.0
-            }
-        ]
-        save_daily_predictions(predictions)
-        
-        # Update with current price
-        update_prediction_price("20240101", "000001.SZ", current_price=11.0, return_pct=10.0)
-        
-        # Verify update
-        all_preds = get_all_predictions()
-        assert len(all_preds) == 1
-        assert all_preds[0]["current_price"] == 11.0
-        assert all_preds[0]["actual_chg"] == 10.0
-    
-    def test_update_prediction_price_at_prediction(self):
-        """Test updating price_at_prediction"""
-        # Save initial prediction without price
-        predictions = [
-            {
-                "trade_date": "20240101",
-                "ts_code": "000001.SZ",
-                "name": "测试股票",
-                "ai_score": 0,
-                "ai_reason": "Test"
-            }
-        ]
-        save_daily_predictions(predictions)
-        
-        # Update price_at_prediction
-        update_prediction_price_at_prediction("20240101", "000001.SZ", price=10.5)
-        
-        # Verify update
-        all_preds = get_all_predictions()
-        assert len(all_preds) == 1
-        assert all_preds[0]["price_at_prediction"] == 10.5
-    
-    def test_update_prediction_price_nonexistent(self):
-        """Test updating non-existent prediction (should not crash)"""
-        # Should not raise exception
-        update_prediction_price("20240101", "999999.SZ", current_price=10.0, return_pct=5.0)
-        update_prediction_price_at_prediction("20240101", "999999.SZ", price=10.0)
+    @pytest.mark.parametrize("scenario", _PRICE_SCENARIOS, ids=lambda sc: sc.name)
+    def test_update_price_scenario(self, scenario):
+        """Test save -> update -> query for each price update scenario"""
+        save_daily_predictions(scenario.predictions)
+        
+        for update_fn, args in scenario.updates:
+            update_fn(*args)
+        
+        by_key = get_all_predictions(as_dict=True)
+        assert by_key.keys() == scenario.expected.keys()
+        for key, fields in scenario.expected.items():
+            for field, value in fields.items():
+                assert by_key[key][field] == value, (key, field)
     
     def test_get_all_predictions_empty(self):
         """Test get_all_predictions with empty database"""
         all_preds = get_all_predictions()
         assert all_preds == []
     
-    def test_price_fields_workflow(self):
-        """Test complete workflow: save -> update price_at_prediction -> update current_price"""
-        # Step 1: Save prediction
-        predictions = [
-            {
-                "trade_date": "20240101",
-                "ts_code": "000001.SZ",
-                "name": "测试股票",
-                "ai_score": 0,
-                "ai_reason": "Test"
-            }
-        ]
-        save_daily_predictions(predictions)
-        
-        # Step 2: Update price_at_prediction
-        update_prediction_price_at_prediction("20240101", "000001.SZ", price=10.0)
-        
-        # Step 3: Update current_price and return
-        update_prediction_price("20240101", "000001.SZ", current_price=11.0, return_pct=10.0)
-        
-        # Verify final state
-        all_preds = get_all_predictions()
-        assert len(all_preds) == 1
-        pred = all_preds[0]
-        assert pred["price_at_prediction"] == 10.0
-        assert pred["current_price"] == 11.0
-        assert pred["actual_chg"] == 10.0
-    
-    def test_multiple_predictions_price_updates(self):
-        """Test updating prices for multiple predictions"""
-        predictions = [
-            {
-                "trade_date": "20240101",
-                "ts_code": "000001.SZ",
-                "name": "股票1",
-                "ai_score": 0,
-                "ai_reason": "Test",
-                "price_at_prediction": 10.0
-            },
-            {
-                "trade_date": "20240101",
-                "ts_code": "000002.SZ",
-                "name": "股票2",
-                "ai_score": 0,
-                "ai_reason": "Test",
-                "price_at_prediction": 20.0
-            }
-        ]
-        save_daily_predictions(predictions)
-        
-        # Update both
-        update_prediction_price("20240101", "000001.SZ", current_price=11.0, return_pct=10.0)
-        update_prediction_price("20240101", "000002.SZ", current_price=18.0, return_pct=-10.0)
-        
-        # Verify both updated
-        all_preds = get_all_predictions()
-        assert len(all_preds) == 2
-        
-        pred1 = next(p for p in all_preds if p["ts_code"] == "000001.SZ")
-        pred2 = next(p for p in all_preds if p["ts_code"] == "000002.SZ")
-        
-        assert pred1["current_price"] == 11.0
-        assert pred1["actual_chg"] == 10.0
-        assert pred2["current_price"] == 18.0
-        assert pred2["actual_chg"] == -10.0
-    
     def test_database_migration(self):
         """Test that database migration adds new columns"""
         # This test verifies that the migration logic works
         # The migration should happen automatically when the module is imported
-        from src.database import Prediction
-        
         # Check that Prediction model has new fields
         assert hasattr(Prediction, 'price_at_prediction')
         assert hasattr(Prediction, 'current_price')
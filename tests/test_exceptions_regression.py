@@ -85,8 +85,7 @@ class TestServiceExceptionHandling:
         from src.services import HunterService
         from src.exceptions import DataFetchError
         
-        with patch('src.data_provider.ts'), \
-             patch.dict('os.environ', {'TUSHARE_TOKEN': 'test_token'}):
+        with patch('src.data_provider.ts'):
             service = HunterService()
             
             # Mock数据获取失败
@@ -104,8 +103,7 @@ class TestServiceExceptionHandling:
         from src.exceptions import StrategyError
         import pandas as pd
         
-        with patch('src.data_provider.ts'), \
-             patch.dict('os.environ', {'TUSHARE_TOKEN': 'test_token'}):
+        with patch('src.data_provider.ts'):
             service = HunterService()
             
             # Mock数据获取成功，但策略失败
@@ -132,8 +130,7 @@ class TestServiceExceptionHandling:
         from src.services import BacktestService
         from src.exceptions import DataFetchError
         
-        with patch('src.data_provider.ts'), \
-             patch.dict('os.environ', {'TUSHARE_TOKEN': 'test_token'}):
+        with patch('src.data_provider.ts'):
             service = BacktestService()
             
             # Mock数据获取失败
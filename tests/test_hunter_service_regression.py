@@ -22,18 +22,15 @@ class TestHunterServiceRegression:
     @pytest.fixture
     def mock_data_provider(self):
         """创建Mock DataProvider"""
-        with patch('src.data_provider.ts'), \
-             patch.dict('os.environ', {'TUSHARE_TOKEN': 'test_token'}):
+        with patch('src.data_provider.ts'):
             dp = DataProvider()
             dp._pro = MagicMock()
             return dp
     
     @pytest.fixture
-    def mock_config(self):
-        """创建Mock ConfigManager"""
-        from src.config_manager import ConfigManager
-        config = ConfigManager()
-        return config
+    def mock_config(self, config_manager):
+        """使用会话共享的ConfigManager"""
+        return config_manager
     
     @pytest.fixture
     def sample_daily_data(self):
@@ -83,8 +80,7 @@ class TestHunterServiceRegression:
     
     def test_hunter_service_auto_initialization(self):
         """测试HunterService自动初始化依赖"""
-        with patch('src.data_provider.ts'), \
-             patch.dict('os.environ', {'TUSHARE_TOKEN': 'test_token'}):
+        with patch('src.data_provider.ts'):
             service = HunterService()
             assert service.data_provider is not None
             assert service.config is not None
@@ -248,18 +244,15 @@ class TestHunterServiceEquivalence:
         
         return pipeline.run(df)
     
-    def test_strategy_filtering_equivalence(self, sample_enriched_data):
+    def test_strategy_filtering_equivalence(self, sample_enriched_data, config_manager):
         """测试策略筛选结果与原有方式一致"""
         # 原有方式
         strategy_old = AlphaStrategy(sample_enriched_data.copy())
         result_old = strategy_old.filter_alpha_trident()
         
         # 新方式（通过Service）
-        with patch('src.data_provider.ts'), \
-             patch.dict('os.environ', {'TUSHARE_TOKEN': 'test_token'}):
-            from src.config_manager import ConfigManager
-            config = ConfigManager()
-            service = HunterService(config=config)
+        with patch('src.data_provider.ts'):
+            service = HunterService(config=config_manager)
             
             trade_date = sample_enriched_data['trade_date'].max()
             result_new = service._apply_strategy(sample_enriched_data.copy(), trade_date)
@@ -21,8 +21,7 @@ class TestHunterWorkflow:
     @pytest.fixture
     def mock_data_provider(self):
         """Create mocked DataProvider"""
-        with patch('src.data_provider.ts'), \
-             patch.dict('os.environ', {'TUSHARE_TOKEN': 'test_token'}):
+        with patch('src.data_provider.ts'):
             dp = DataProvider()
             dp._pro = MagicMock()
             return dp
@@ -155,38 +154,10 @@ class TestHunterWorkflow:
         assert isinstance(result_df, pd.DataFrame)
 
 
+@pytest.mark.usefixtures("clean_db")
 class TestHunterDatabaseIntegration:
     """Test database integration in Hunter workflow"""
     
-    @pytest.fixture(autouse=True)
-    def setup_test_db(self, tmp_path, monkeypatch):
-        """Setup test database"""
-        import src.database
-        test_db_path = tmp_path / "test_daas.db"
-        test_data_dir = tmp_path / "data"
-        test_data_dir.mkdir()
-        
-        original_db_path = src.database._DB_PATH
-        src.database._DB_PATH = test_db_path
-        
-        from sqlalchemy import create_engine
-        from sqlalchemy.orm import sessionmaker
-        src.database._engine = create_engine(
-            f"sqlite:///{test_db_path}",
-            connect_args={"check_same_thread": False}
-        )
-        src.database._SessionLocal = sessionmaker(
-            bind=src.database._engine,
-            autoflush=False,
-            autocommit=False
-        )
-        from src.database import Base
-        Base.metadata.create_all(src.database._engine)
-        
-        yield
-        
-        src.database._DB_PATH = original_db_path
-    
     def test_save_predictions_with_price(self):
         """Test saving predictions with price_at_prediction"""
         predictions = [
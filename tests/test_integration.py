@@ -14,6 +14,12 @@ from src.monitor import AnnouncementMonitor
 from src.reporter import ReportGenerator
 
 
+@pytest.fixture(autouse=True)
+def _reset_data_loader():
+    """Drop DataLoader's cached Tushare handle so each test sees its own patched ts"""
+    DataLoader.reset()
+
+
 class TestEndToEndWorkflow:
     """Test complete end-to-end workflow with mocked data"""
     
@@ -22,9 +28,7 @@ class TestEndToEndWorkflow:
                          sample_financial_indicators, sample_notices):
         """Create mocked DataLoader"""
         with patch('src.data_loader.load_dotenv'), \
-             patch('src.data_loader.ts') as mock_ts, \
-             patch('src.data_loader.time.sleep'), \
-             patch.dict('os.environ', {'TUSHARE_TOKEN': 'test_token'}):
+             patch('src.data_loader.ts') as mock_ts:
             
             mock_pro = MagicMock()
             mock_ts.pro_api.return_value = mock_pro
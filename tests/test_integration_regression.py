@@ -19,8 +19,7 @@ class TestHunterIntegration:
     @pytest.fixture
     def mock_data_provider(self):
         """创建Mock DataProvider"""
-        with patch('src.data_provider.ts'), \
-             patch.dict('os.environ', {'TUSHARE_TOKEN': 'test_token'}):
+        with patch('src.data_provider.ts'):
             from src.data_provider import DataProvider
             dp = DataProvider()
             dp._pro = MagicMock()
@@ -126,8 +125,7 @@ class TestBacktestIntegration:
     @pytest.fixture
     def mock_data_provider(self):
         """创建Mock DataProvider"""
-        with patch('src.data_provider.ts'), \
-             patch.dict('os.environ', {'TUSHARE_TOKEN': 'test_token'}):
+        with patch('src.data_provider.ts'):
             from src.data_provider import DataProvider
             dp = DataProvider()
             dp._pro = MagicMock()
@@ -197,43 +195,14 @@ class TestBacktestIntegration:
             assert 'win_rate' in result.results
 
 
+@pytest.mark.usefixtures("clean_db")
 class TestTruthIntegration:
     """Truth端到端集成测试"""
     
-    @pytest.fixture(autouse=True)
-    def setup_test_db(self, tmp_path, monkeypatch):
-        """设置测试数据库"""
-        import src.database
-        test_db_path = tmp_path / "test_daas.db"
-        test_data_dir = tmp_path / "data"
-        test_data_dir.mkdir()
-        
-        original_db_path = src.database._DB_PATH
-        src.database._DB_PATH = test_db_path
-        
-        from sqlalchemy import create_engine
-        from sqlalchemy.orm import sessionmaker
-        src.database._engine = create_engine(
-            f"sqlite:///{test_db_path}",
-            connect_args={"check_same_thread": False}
-        )
-        src.database._SessionLocal = sessionmaker(
-            bind=src.database._engine,
-            autoflush=False,
-            autocommit=False
-        )
-        from src.database import Base
-        Base.metadata.create_all(src.database._engine)
-        
-        yield
-        
-        src.database._DB_PATH = original_db_path
-    
     @pytest.fixture
     def mock_data_provider(self):
         """创建Mock DataProvider"""
-        with patch('src.data_provider.ts'), \
-             patch.dict('os.environ', {'TUSHARE_TOKEN': 'test_token'}):
+        with patch('src.data_provider.ts'):
             from src.data_provider import DataProvider
             dp = DataProvider()
             dp._pro = MagicMock()
@@ -266,8 +235,7 @@ class TestTruthIntegration:
         service = TruthService(data_provider=mock_data_provider)
         
         # 更新价格
-        with patch('src.services.truth_service.time.sleep'):
-            result = service.update_prices()
+        result = service.update_prices()
         
         # 验证结果
         assert isinstance(result, type(service.update_prices()))  # TruthResult类型
@@ -284,42 +252,13 @@ class TestTruthIntegration:
         assert 'total_count' in win_rate_info
 
 
+@pytest.mark.usefixtures("clean_db")
 class TestServiceToRepositoryIntegration:
     """测试Service到Repository的集成"""
     
-    @pytest.fixture(autouse=True)
-    def setup_test_db(self, tmp_path, monkeypatch):
-        """设置测试数据库"""
-        import src.database
-        test_db_path = tmp_path / "test_daas.db"
-        test_data_dir = tmp_path / "data"
-        test_data_dir.mkdir()
-        
-        original_db_path = src.database._DB_PATH
-        src.database._DB_PATH = test_db_path
-        
-        from sqlalchemy import create_engine
-        from sqlalchemy.orm import sessionmaker
-        src.database._engine = create_engine(
-            f"sqlite:///{test_db_path}",
-            connect_args={"check_same_thread": False}
-        )
-        src.database._SessionLocal = sessionmaker(
-            bind=src.database._engine,
-            autoflush=False,
-            autocommit=False
-        )
-        from src.database import Base
-        Base.metadata.create_all(src.database._engine)
-        
-        yield
-        
-        src.database._DB_PATH = original_db_path
-    
     def test_hunter_to_repository_flow(self):
         """测试Hunter到Repository的完整流程"""
-        with patch('src.data_provider.ts'), \
-             patch.dict('os.environ', {'TUSHARE_TOKEN': 'test_token'}):
+        with patch('src.data_provider.ts'):
             from src.data_provider import DataProvider
             from src.services import HunterService
             from src.repositories import PredictionRepository
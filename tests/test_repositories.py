@@ -22,38 +22,10 @@ from src.database import (
 )
 
 
+@pytest.mark.usefixtures("clean_db")
 class TestPredictionRepository:
     """测试PredictionRepository"""
     
-    @pytest.fixture(autouse=True)
-    def setup_test_db(self, tmp_path, monkeypatch):
-        """设置测试数据库"""
-        import src.database
-        test_db_path = tmp_path / "test_daas.db"
-        test_data_dir = tmp_path / "data"
-        test_data_dir.mkdir()
-        
-        original_db_path = src.database._DB_PATH
-        src.database._DB_PATH = test_db_path
-        
-        from sqlalchemy import create_engine
-        from sqlalchemy.orm import sessionmaker
-        src.database._engine = create_engine(
-            f"sqlite:///{test_db_path}",
-            connect_args={"check_same_thread": False}
-        )
-        src.database._SessionLocal = sessionmaker(
-            bind=src.database._engine,
-            autoflush=False,
-            autocommit=False
-        )
-        from src.database import Base
-        Base.metadata.create_all(src.database._engine)
-        
-        yield
-        
-        src.database._DB_PATH = original_db_path
-    
     def test_prediction_repository_save(self):
         """测试PredictionRepository保存功能"""
         repo = PredictionRepository()
@@ -163,6 +135,7 @@ class TestPredictionRepository:
         assert all_preds[0]["actual_chg"] == 10.0
 
 
+@pytest.mark.usefixtures("clean_db")
 class TestHistoryRepository:
     """测试HistoryRepository"""
     
@@ -202,6 +175,7 @@ class TestHistoryRepository:
             pytest.skip("数据库未配置，跳过保存测试")
 
 
+@pytest.mark.usefixtures("clean_db")
 class TestConstituentRepository:
     """测试ConstituentRepository"""
     
@@ -21,8 +21,7 @@ class TestBaseService:
     
     def test_base_service_initialization(self):
         """测试BaseService可以正确初始化"""
-        with patch('src.data_provider.ts'), \
-             patch.dict('os.environ', {'TUSHARE_TOKEN': 'test_token'}):
+        with patch('src.data_provider.ts'):
             service = BaseService()
             assert service.data_provider is not None
             assert service.config is not None
@@ -41,8 +40,7 @@ class TestBaseService:
     
     def test_base_service_partial_injection(self):
         """测试部分依赖注入（只注入一个依赖）"""
-        with patch('src.data_provider.ts'), \
-             patch.dict('os.environ', {'TUSHARE_TOKEN': 'test_token'}):
+        with patch('src.data_provider.ts'):
             mock_config = MagicMock()
             
             service = BaseService(config=mock_config)
@@ -57,8 +55,7 @@ class TestHunterService:
     
     def test_hunter_service_initialization(self):
         """测试HunterService可以正确初始化"""
-        with patch('src.data_provider.ts'), \
-             patch.dict('os.environ', {'TUSHARE_TOKEN': 'test_token'}):
+        with patch('src.data_provider.ts'):
             service = HunterService()
             assert service.data_provider is not None
             assert service.config is not None
@@ -75,8 +72,7 @@ class TestHunterService:
     
     def test_hunter_service_config_usage(self):
         """测试配置使用"""
-        with patch('src.data_provider.ts'), \
-             patch.dict('os.environ', {'TUSHARE_TOKEN': 'test_token'}):
+        with patch('src.data_provider.ts'):
             service = HunterService()
             
             # 验证可以访问配置
@@ -89,8 +85,7 @@ class TestBacktestService:
     
     def test_backtest_service_initialization(self):
         """测试BacktestService可以正确初始化"""
-        with patch('src.data_provider.ts'), \
-             patch.dict('os.environ', {'TUSHARE_TOKEN': 'test_token'}):
+        with patch('src.data_provider.ts'):
             service = BacktestService()
             assert service.data_provider is not None
             assert service.config is not None
@@ -107,8 +102,7 @@ class TestBacktestService:
     
     def test_backtest_service_config_usage(self):
         """测试配置使用"""
-        with patch('src.data_provider.ts'), \
-             patch.dict('os.environ', {'TUSHARE_TOKEN': 'test_token'}):
+        with patch('src.data_provider.ts'):
             service = BacktestService()
             
             # 验证可以访问配置
@@ -121,8 +115,7 @@ class TestTruthService:
     
     def test_truth_service_initialization(self):
         """测试TruthService可以正确初始化"""
-        with patch('src.data_provider.ts'), \
-             patch.dict('os.environ', {'TUSHARE_TOKEN': 'test_token'}):
+        with patch('src.data_provider.ts'):
             service = TruthService()
             assert service.data_provider is not None
             assert service.config is not None
@@ -139,8 +132,7 @@ class TestTruthService:
     
     def test_truth_service_config_usage(self):
         """测试配置使用"""
-        with patch('src.data_provider.ts'), \
-             patch.dict('os.environ', {'TUSHARE_TOKEN': 'test_token'}):
+        with patch('src.data_provider.ts'):
             service = TruthService()
             
             # 验证可以访问配置
@@ -153,8 +145,7 @@ class TestServiceIsolation:
     
     def test_services_independent(self):
         """测试不同Service实例相互独立"""
-        with patch('src.data_provider.ts'), \
-             patch.dict('os.environ', {'TUSHARE_TOKEN': 'test_token'}):
+        with patch('src.data_provider.ts'):
             hunter_service = HunterService()
             backtest_service = BacktestService()
             truth_service = TruthService()
@@ -17,18 +17,16 @@ class TestHunterServiceExceptions:
     @pytest.fixture
     def mock_data_provider(self):
         """创建Mock DataProvider"""
-        with patch('src.data_provider.ts'), \
-             patch.dict('os.environ', {'TUSHARE_TOKEN': 'test_token'}):
+        with patch('src.data_provider.ts'):
             from src.data_provider import DataProvider
             dp = DataProvider()
             dp._pro = MagicMock()
             return dp
     
     @pytest.fixture
-    def mock_config(self):
-        """创建Mock ConfigManager"""
-        from src.config_manager import ConfigManager
-        return ConfigManager()
+    def mock_config(self, config_manager):
+        """使用会话共享的ConfigManager"""
+        return config_manager
     
     def test_hunter_service_data_fetch_error(self, mock_data_provider, mock_config):
         """测试HunterService处理DataFetchError"""
@@ -124,18 +122,16 @@ class TestBacktestServiceExceptions:
     @pytest.fixture
     def mock_data_provider(self):
         """创建Mock DataProvider"""
-        with patch('src.data_provider.ts'), \
-             patch.dict('os.environ', {'TUSHARE_TOKEN': 'test_token'}):
+        with patch('src.data_provider.ts'):
             from src.data_provider import DataProvider
             dp = DataProvider()
             dp._pro = MagicMock()
             return dp
     
     @pytest.fixture
-    def mock_config(self):
-        """创建Mock ConfigManager"""
-        from src.config_manager import ConfigManager
-        return ConfigManager()
+    def mock_config(self, config_manager):
+        """使用会话共享的ConfigManager"""
+        return config_manager
     
     def test_backtest_service_data_fetch_error(self, mock_data_provider, mock_config):
         """测试BacktestService处理DataFetchError"""
@@ -196,18 +192,16 @@ class TestTruthServiceExceptions:
     @pytest.fixture
     def mock_data_provider(self):
         """创建Mock DataProvider"""
-        with patch('src.data_provider.ts'), \
-             patch.dict('os.environ', {'TUSHARE_TOKEN': 'test_token'}):
+        with patch('src.data_provider.ts'):
             from src.data_provider import DataProvider
             dp = DataProvider()
             dp._pro = MagicMock()
             return dp
     
     @pytest.fixture
-    def mock_config(self):
-        """创建Mock ConfigManager"""
-        from src.config_manager import ConfigManager
-        return ConfigManager()
+    def mock_config(self, config_manager):
+        """使用会话共享的ConfigManager"""
+        return config_manager
     
     def test_truth_service_error_handling(self, mock_data_provider, mock_config):
         """测试TruthService错误处理"""
@@ -217,8 +211,7 @@ class TestTruthServiceExceptions:
         mock_data_provider._pro.daily = MagicMock(side_effect=Exception("API Error"))
         
         # 应该能够处理错误并返回结果
-        with patch('src.services.truth_service.time.sleep'):
-            result = service.update_prices()
+        result = service.update_prices()
         
         # 验证结果结构
         assert hasattr(result, 'success')
@@ -9,7 +9,6 @@ import numpy as np
 from unittest.mock import MagicMock
 
 from src.strategy import AlphaStrategy
-from src.config_manager import ConfigManager
 from src.factors import FactorPipeline, RPSFactor, MAFactor, VolumeRatioFactor, PEProxyFactor
 
 
@@ -52,10 +51,9 @@ class TestAlphaStrategyConfigIntegration:
         
         return pipeline.run(df)
     
-    def test_alpha_strategy_with_config(self, sample_enriched_data):
+    def test_alpha_strategy_with_config(self, sample_enriched_data, config_manager):
         """测试AlphaStrategy使用配置"""
-        config = ConfigManager()
-        strategy = AlphaStrategy(sample_enriched_data.copy(), config=config)
+        strategy = AlphaStrategy(sample_enriched_data.copy(), config=config_manager)
         
         # 验证阈值从配置读取
         assert hasattr(strategy, 'rps_threshold')
@@ -72,24 +70,21 @@ class TestAlphaStrategyConfigIntegration:
         assert strategy.rps_threshold == 85  # 默认值
         assert strategy.vol_ratio_threshold == 1.5  # 默认值
     
-    def test_alpha_strategy_config_threshold(self, sample_enriched_data):
+    def test_alpha_strategy_config_threshold(self, sample_enriched_data, config_manager):
         """测试配置阈值生效"""
-        config = ConfigManager()
-        
         # 获取配置中的阈值
-        rps_threshold = config.get('strategy.alpha_trident.rps_threshold', 85)
-        vol_ratio_threshold = config.get('strategy.alpha_trident.vol_ratio_threshold', 1.5)
+        rps_threshold = config_manager.get('strategy.alpha_trident.rps_threshold', 85)
+        vol_ratio_threshold = config_manager.get('strategy.alpha_trident.vol_ratio_threshold', 1.5)
         
-        strategy = AlphaStrategy(sample_enriched_data.copy(), config=config)
+        strategy = AlphaStrategy(sample_enriched_data.copy(), config=config_manager)
         
         # 验证策略使用了配置的阈值
         assert strategy.rps_threshold == rps_threshold
         assert strategy.vol_ratio_threshold == vol_ratio_threshold
     
-    def test_alpha_strategy_filtering_with_config(self, sample_enriched_data):
+    def test_alpha_strategy_filtering_with_config(self, sample_enriched_data, config_manager):
         """测试使用配置阈值进行筛选"""
-        config = ConfigManager()
-        strategy = AlphaStrategy(sample_enriched_data.copy(), config=config)
+        strategy = AlphaStrategy(sample_enriched_data.copy(), config=config_manager)
         
         # 手动设置一些股票满足条件
         if len(sample_enriched_data) > 0:
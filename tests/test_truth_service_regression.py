@@ -12,53 +12,23 @@ from src.services import TruthService, TruthResult
 from src.database import get_all_predictions, save_daily_predictions
 
 
+@pytest.mark.usefixtures("clean_db")
 class TestTruthServiceRegression:
     """Truth Service回归测试"""
     
     @pytest.fixture
     def mock_data_provider(self):
         """创建Mock DataProvider"""
-        with patch('src.data_provider.ts'), \
-             patch.dict('os.environ', {'TUSHARE_TOKEN': 'test_token'}):
+        with patch('src.data_provider.ts'):
             from src.data_provider import DataProvider
             dp = DataProvider()
             dp._pro = MagicMock()
             return dp
     
     @pytest.fixture
-    def mock_config(self):
-        """创建Mock ConfigManager"""
-        from src.config_manager import ConfigManager
-        return ConfigManager()
-    
-    @pytest.fixture(autouse=True)
-    def setup_test_db(self, tmp_path, monkeypatch):
-        """设置测试数据库"""
-        import src.database
-        test_db_path = tmp_path / "test_daas.db"
-        test_data_dir = tmp_path / "data"
-        test_data_dir.mkdir()
-        
-        original_db_path = src.database._DB_PATH
-        src.database._DB_PATH = test_db_path
-        
-        from sqlalchemy import create_engine
-        from sqlalchemy.orm import sessionmaker
-        src.database._engine = create_engine(
-            f"sqlite:///{test_db_path}",
-            connect_args={"check_same_thread": False}
-        )
-        src.database._SessionLocal = sessionmaker(
-            bind=src.database._engine,
-            autoflush=False,
-            autocommit=False
-        )
-        from src.database import Base
-        Base.metadata.create_all(src.database._engine)
-        
-        yield
-        
-        src.database._DB_PATH = original_db_path
+    def mock_config(self, config_manager):
+        """使用会话共享的ConfigManager"""
+        return config_manager
     
     @pytest.fixture
     def sample_predictions(self):
@@ -167,9 +137,7 @@ class TestTruthServiceRegression:
         
         mock_data_provider._pro.daily = MagicMock(return_value=mock_daily_data)
         
-        # Mock time.sleep
-        with patch('src.services.truth_service.time.sleep'):
-            result = service.update_prices()
+        result = service.update_prices()
         
         # 验证结果
         assert result.success
@@ -195,9 +163,7 @@ class TestTruthServiceRegression:
         # Mock API调用抛出异常
         mock_data_provider._pro.daily = MagicMock(side_effect=Exception("API Error"))
         
-        # Mock time.sleep
-        with patch('src.services.truth_service.time.sleep'):
-            result = service.update_prices()
+        result = service.update_prices()
         
         # 应该成功完成（跳过失败的记录）
         assert result.success
@@ -205,51 +171,20 @@ class TestTruthServiceRegression:
         # updated_count应该为0（因为所有更新都失败）
 
 
+@pytest.mark.usefixtures("clean_db")
 class TestTruthServiceEquivalence:
     """测试TruthService与原有逻辑的等价性"""
     
-    @pytest.fixture(autouse=True)
-    def setup_test_db(self, tmp_path, monkeypatch):
-        """设置测试数据库"""
-        import src.database
-        test_db_path = tmp_path / "test_daas.db"
-        test_data_dir = tmp_path / "data"
-        test_data_dir.mkdir()
-        
-        original_db_path = src.database._DB_PATH
-        src.database._DB_PATH = test_db_path
-        
-        from sqlalchemy import create_engine
-        from sqlalchemy.orm import sessionmaker
-        src.database._engine = create_engine(
-            f"sqlite:///{test_db_path}",
-            connect_args={"check_same_thread": False}
-        )
-        src.database._SessionLocal = sessionmaker(
-            bind=src.database._engine,
-            autoflush=False,
-            autocommit=False
-        )
-        from src.database import Base
-        Base.metadata.create_all(src.database._engine)
-        
-        yield
-        
-        src.database._DB_PATH = original_db_path
-    
-    def test_win_rate_calculation_equivalence(self):
+    def test_win_rate_calculation_equivalence(self, fake_config):
         """测试胜率计算与原有逻辑一致"""
         from src.services import TruthService
         
-        with patch('src.data_provider.ts'), \
-             patch.dict('os.environ', {'TUSHARE_TOKEN': 'test_token'}):
+        with patch('src.data_provider.ts'):
             from src.data_provider import DataProvider
-            from src.config_manager import ConfigManager
             
             dp = DataProvider()
             dp._pro = MagicMock()
-            config = ConfigManager()
-            service = TruthService(data_provider=dp, config=config)
+            service = TruthService(data_provider=dp, config=fake_config)
             
             # 测试数据
             df = pd.DataFrame({
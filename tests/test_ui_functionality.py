@@ -122,8 +122,7 @@ class TestUIFunctionalityBasic:
         from src.factors import FactorPipeline, RPSFactor, MAFactor, VolumeRatioFactor, PEProxyFactor
         
         # 验证Service可以初始化
-        with patch('src.data_provider.ts'), \
-             patch.dict('os.environ', {'TUSHARE_TOKEN': 'test_token'}):
+        with patch('src.data_provider.ts'):
             service = HunterService()
             assert service is not None
         
@@ -143,14 +142,12 @@ class TestUIFunctionalityBasic:
         from src.backtest import VectorBacktester
         
         # 验证Service可以初始化
-        with patch('src.data_provider.ts'), \
-             patch.dict('os.environ', {'TUSHARE_TOKEN': 'test_token'}):
+        with patch('src.data_provider.ts'):
             service = BacktestService()
             assert service is not None
         
         # 验证VectorBacktester仍然可用
-        with patch('src.data_provider.ts'), \
-             patch.dict('os.environ', {'TUSHARE_TOKEN': 'test_token'}):
+        with patch('src.data_provider.ts'):
             backtester = VectorBacktester()
             assert backtester is not None
             assert len(backtester.factor_pipeline) == 4
@@ -162,8 +159,7 @@ class TestUIFunctionalityBasic:
         from src.database import get_all_predictions, update_prediction_price
         
         # 验证Service可以初始化
-        with patch('src.data_provider.ts'), \
-             patch.dict('os.environ', {'TUSHARE_TOKEN': 'test_token'}):
+        with patch('src.data_provider.ts'):
             service = TruthService()
             assert service is not None
             assert hasattr(service, 'update_prices')